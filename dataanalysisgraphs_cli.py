@@ -0,0 +1,79 @@
+import argparse
+import os
+import sys
+
+"""
+DataAnalysisGraphs command line entry point (`dataanalysisgraphs <command>`).
+Only argparse and the light health/sweep parsers are imported here; each command
+imports pandas, matplotlib, geopandas, rasterio, scipy etc. only when it runs.
+"""
+
+# Only this module is installed; the scripts it drives (main.py, health.py, ...)
+# are loaded from the checkout it lives in so they never claim global module names
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import health
+import main as sweep
+
+def _population(args, rest):
+    from src import get_all_data
+    years = range(args.years[0], args.years[1] + 1) if args.years else None
+    return get_all_data.main(UN=args.raster == "un", years=years, countries=args.countries,
+                             resolution=args.resolution, draw_images=not args.no_plots, exact=args.exact,
+                             memory_budget=args.memory_budget * 1024 * 1024 if args.memory_budget else None)
+
+def _health(args, rest):
+    return health.main(rest)
+
+def _sweep(args, rest):
+    return sweep.main(rest)
+
+def _opr(args, rest):
+    from first import analysis
+    return analysis.main([args.url] if args.url else [])
+
+def _simulate(args, rest):
+    from first import simulation
+    return simulation.main(([args.url] if args.url else [simulation.DEFAULT_URL]) + [str(args.simulations)])
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="dataanalysisgraphs", description="Generate data analysis graphs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    population = subparsers.add_parser("population", help="Occupied population per deepstatemap snapshot.")
+    population.add_argument("--raster", choices=["un", "plain"], default="un", help="WorldPop raster variant (UN adjusted by default).")
+    population.add_argument("--years", type=sweep.year_range, help="WorldPop year or START-END range (e.g. 2000-2020); one population column per year.")
+    population.add_argument("--countries", nargs="+", default=["UKR"], help="ISO codes of the country rasters to combine (with --years).")
+    population.add_argument("--resolution", choices=["month", "day", "all"], default="month",
+                            help="Snapshots to process: first per month, first per day, or every snapshot.")
+    population.add_argument("--exact", action="store_true", help="Weight boundary cells by their covered fraction (exact coverage).")
+    population.add_argument("--memory-budget", type=int, metavar="MB",
+                            help="Process the raster in tiles using at most about MB megabytes (no plots).")
+    population.add_argument("--no-plots", action="store_true", help="Skip the per-snapshot population maps.")
+    population.set_defaults(run=_population)
+
+    subparsers.add_parser("health", parents=[health.build_parser()], add_help=False,
+                          help="Life expectancy vs. hours of effort trajectories.").set_defaults(run=_health)
+    subparsers.add_parser("sweep", parents=[sweep.build_parser()], add_help=False,
+                          help="Log-scale health graphs over weight / country / year sweeps.").set_defaults(run=_sweep)
+
+    opr = subparsers.add_parser("opr", help="FTC team contributions (OPR) and match predictions.")
+    opr.add_argument("url", nargs="?", help="Event qualifications URL.")
+    opr.set_defaults(run=_opr)
+
+    simulate = subparsers.add_parser("simulate", help="Monte Carlo event simulation on top of OPR.")
+    simulate.add_argument("url", nargs="?", help="Event qualifications URL.")
+    simulate.add_argument("-n", "--simulations", type=int, default=10000, help="Number of simulated events.")
+    simulate.set_defaults(run=_simulate)
+    return parser
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser().parse_args(argv)
+    # Commands that own their parser get their raw arguments back
+    return args.run(args, argv[1:])
+
+if __name__ == "__main__":
+    sys.exit(main())
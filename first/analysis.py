@@ -3,6 +3,8 @@ from bs4 import BeautifulSoup
 import pandas as pd
 import numpy as np
 from scipy.optimize import lsq_linear
+from scipy.sparse import csr_matrix, identity, vstack
+from scipy.sparse.linalg import lsmr, lsqr, spsolve
 import sys
 import urllib.parse
 
@@ -108,121 +110,158 @@ def parse_match_scores(match_url):
 
     return scores if found_data else None
 
-def calculate_opr(matches):
-    """Solves the Ax=b system for team contributions using Least Squares."""
-    # Unique teams from all matches to ensure the OPR map is complete
+# (OPR column, score breakdown key) for each independently solved component
+COMPONENTS = [('Auto', 'auto'), ('Teleop', 'teleop'), ('Penalty', 'penalty_committed')]
+
+def alliance_matrices(matches, team_to_idx):
+    """Builds sparse red/blue incidence matrices (one row per match, one column per team).
+
+    Teams missing from team_to_idx are skipped, so they contribute nothing.
+    """
+    entries = {'red': ([], []), 'blue': ([], [])}
+    for i, m in enumerate(matches):
+        for color, (rows, cols) in entries.items():
+            for t in m['teams'][color]:
+                idx = team_to_idx.get(t)
+                if idx is not None:
+                    rows.append(i)
+                    cols.append(idx)
+
+    shape = (len(matches), len(team_to_idx))
+    return tuple(
+        csr_matrix((np.ones(len(rows)), (rows, cols)), shape=shape)
+        for rows, cols in entries.values()
+    )
+
+# Least squares backends for calculate_opr
+SOLVERS = ['bounded', 'lstsq', 'ridge', 'lsqr', 'lsmr']
+
+def solve_contributions(A, b, solver='bounded', ridge_alpha=1.0):
+    """Solves min ||Ax - b|| for the sparse alliance matrix A with the given backend.
+
+    'bounded' is lsq_linear with non-negative contributions, 'lstsq' dense
+    unconstrained least squares, 'ridge' the sparse normal equations with an
+    L2 penalty of ridge_alpha, 'lsqr' / 'lsmr' sparse iterative solvers.
+    """
+    if solver == 'bounded':
+        return lsq_linear(A.toarray(), b, bounds=(0, np.inf)).x
+    if solver == 'lstsq':
+        return np.linalg.lstsq(A.toarray(), b, rcond=None)[0]
+    if solver == 'ridge':
+        return spsolve((A.T @ A + ridge_alpha * identity(A.shape[1])).tocsc(), A.T @ b)
+    if solver == 'lsqr':
+        return lsqr(A, b, atol=1e-10, btol=1e-10)[0]
+    if solver == 'lsmr':
+        return lsmr(A, b, atol=1e-10, btol=1e-10)[0]
+    raise ValueError(f"Unknown solver {solver!r}, expected one of {SOLVERS}")
+
+def team_index(matches):
+    """Sorted team numbers of all matches (played or not) and their column positions."""
     all_teams = set()
     for m in matches:
         all_teams.update(m['teams']['red'])
         all_teams.update(m['teams']['blue'])
-    
-    sorted_teams = sorted(list(all_teams), key=int)
-    team_to_idx = {team: i for i, team in enumerate(sorted_teams)}
-    num_teams = len(sorted_teams)
-    
-    A = []
-    b_auto = []
-    b_teleop = []
-    b_penalty = []
-    
-    for m in matches:
-        if 'scores' not in m or not m['scores']:
-            continue
-        if not m['teams']['red'] or not m['teams']['blue']:
-            continue
-            
-        # Red Alliance row
-        row_red = np.zeros(num_teams)
-        for t in m['teams']['red']:
-            row_red[team_to_idx[t]] = 1
-        A.append(row_red)
-        b_auto.append(m['scores']['red']['auto'])
-        b_teleop.append(m['scores']['red']['teleop'])
-        b_penalty.append(m['scores']['red']['penalty_committed'])
-        
-        # Blue Alliance row
-        row_blue = np.zeros(num_teams)
-        for t in m['teams']['blue']:
-            row_blue[team_to_idx[t]] = 1
-        A.append(row_blue)
-        b_auto.append(m['scores']['blue']['auto'])
-        b_teleop.append(m['scores']['blue']['teleop'])
-        b_penalty.append(m['scores']['blue']['penalty_committed'])
-
-    if not A:
+    sorted_teams = sorted(all_teams, key=int)
+    return sorted_teams, {team: i for i, team in enumerate(sorted_teams)}
+
+def played_matches(matches):
+    """Matches with scores and two non-empty alliances, the rows OPR is fitted on."""
+    return [m for m in matches
+            if m.get('scores') and m['teams']['red'] and m['teams']['blue']]
+
+def opr_system(played, team_to_idx):
+    """Builds the least squares system of played matches.
+
+    Returns the 0/1 alliance matrix A (red alliance rows followed by blue alliance
+    rows) and one target vector b per entry of COMPONENTS, in the same row order.
+    """
+    red, blue = alliance_matrices(played, team_to_idx)
+    A = vstack([red, blue]).tocsr()
+    A.data[:] = 1
+    targets = [np.array([m['scores']['red'][key] for m in played] +
+                        [m['scores']['blue'][key] for m in played], dtype=float)
+               for _, key in COMPONENTS]
+    return A, targets
+
+def calculate_opr(matches, solver='bounded', ridge_alpha=1.0):
+    """Solves the Ax=b system for team contributions using Least Squares.
+
+    solver and ridge_alpha select the backend (see solve_contributions).
+    Returns the results table and an OPR dict holding 'teams', 'index'
+    (team -> position) and one NumPy array per component aligned with 'teams',
+    plus a '<component> SD' array with the residual spread of each component.
+    """
+    sorted_teams, team_to_idx = team_index(matches)
+    played = played_matches(matches)
+    if not played:
          return pd.DataFrame(), {}
 
-    A = np.array(A)
+    A, targets = opr_system(played, team_to_idx)
+    alliance_sizes = np.asarray(A.sum(axis=1)).ravel()
+    team_rows = np.asarray(A.sum(axis=0)).ravel()
+
     results = pd.DataFrame({'Team': sorted_teams})
-    opr_map = {team: {} for team in sorted_teams}
-    
-    for name, b in [('Auto', b_auto), ('Teleop', b_teleop), ('Penalty', b_penalty)]:
-        b = np.array(b)
-        res = lsq_linear(A, b, bounds=(0, np.inf))
-        results[name] = res.x
-        for i, team in enumerate(sorted_teams):
-            opr_map[team][name] = res.x[i]
-
-    results['Non-Penalty Total'] = results['Auto'] + results['Teleop']
-    results['Total'] = results['Auto'] + results['Teleop'] - results['Penalty']
-    
-    for team in sorted_teams:
-        opr_map[team]['Non-Penalty Total'] = results[results['Team'] == team]['Non-Penalty Total'].values[0]
-        opr_map[team]['Total'] = results[results['Team'] == team]['Total'].values[0]
+    opr = {'teams': np.array(sorted_teams), 'index': team_to_idx}
 
-    return results.sort_values(by='Total', ascending=False), opr_map
+    for (name, _), b in zip(COMPONENTS, targets):
+        x = solve_contributions(A, b, solver, ridge_alpha)
+        results[name] = x
+        opr[name] = x
 
-def predict_matches(matches, opr_map):
-    """Predicts scores for all matches using OPR map."""
-    predictions = []
-    
-    for m in matches:
-        red_teams = m['teams']['red']
-        blue_teams = m['teams']['blue']
-        
-        if not red_teams and not blue_teams:
-            continue
-            
-        pred = {
-            'Match': m['match_num'],
-            'Red Teams': ", ".join(red_teams),
-            'Blue Teams': ", ".join(blue_teams),
-        }
-        
-        # Calculate predicted totals
-        red_np_total = sum(opr_map.get(t, {}).get('Non-Penalty Total', 0) for t in red_teams)
-        red_penalty_gained = sum(opr_map.get(t, {}).get('Penalty', 0) for t in blue_teams)
-        pred['Red Pred NP'] = red_np_total
-        pred['Red Pred Total'] = red_np_total + red_penalty_gained
-        
-        blue_np_total = sum(opr_map.get(t, {}).get('Non-Penalty Total', 0) for t in blue_teams)
-        blue_penalty_gained = sum(opr_map.get(t, {}).get('Penalty', 0) for t in red_teams)
-        pred['Blue Pred NP'] = blue_np_total
-        pred['Blue Pred Total'] = blue_np_total + blue_penalty_gained
-        
-        # Add actual scores if available
-        if 'scores' in m and m['scores']:
-            pred['Red Act NP'] = m['scores']['red']['auto'] + m['scores']['red']['teleop']
-            pred['Red Act Total'] = pred['Red Act NP'] + m['scores']['blue']['penalty_committed']
-            pred['Blue Act NP'] = m['scores']['blue']['auto'] + m['scores']['blue']['teleop']
-            pred['Blue Act Total'] = pred['Blue Act NP'] + m['scores']['red']['penalty_committed']
-        else:
-            pred['Red Act NP'] = np.nan
-            pred['Red Act Total'] = np.nan
-            pred['Blue Act NP'] = np.nan
-            pred['Blue Act Total'] = np.nan
-            
-        predictions.append(pred)
-        
-    return pd.DataFrame(predictions)
+        # Split each alliance's squared residual evenly between its teams and
+        # average per team to get a per-team contribution spread
+        residual_share = (b - A @ x) ** 2 / alliance_sizes
+        opr[f'{name} SD'] = np.sqrt(np.divide(A.T @ residual_share, team_rows,
+                                              out=np.zeros(len(sorted_teams)),
+                                              where=team_rows > 0))
 
-def main():
-    url = "https://ftc-events.firstinspires.org/2025/ILKSQ1/qualifications"
-    url = "https://ftc-events.firstinspires.org/2025/USTXNIM3/qualifications"
-    url = "https://ftc-events.firstinspires.org/2025/ILKSQ2/qualifications/"
-    if len(sys.argv) > 1:
-        url = sys.argv[1]
-        
+    opr['Non-Penalty Total'] = opr['Auto'] + opr['Teleop']
+    opr['Total'] = opr['Non-Penalty Total'] - opr['Penalty']
+    results['Non-Penalty Total'] = opr['Non-Penalty Total']
+    results['Total'] = opr['Total']
+
+    return results.sort_values(by='Total', ascending=False), opr
+
+def predict_matches(matches, opr):
+    """Predicts scores for all matches using the OPR arrays from calculate_opr."""
+    matches = [m for m in matches if m['teams']['red'] or m['teams']['blue']]
+    n = len(matches)
+    team_to_idx = opr.get('index', {})
+    num_teams = len(team_to_idx)
+    np_total = opr.get('Non-Penalty Total', np.zeros(num_teams))
+    penalty = opr.get('Penalty', np.zeros(num_teams))
+
+    red, blue = alliance_matrices(matches, team_to_idx)
+    red_np = red @ np_total
+    blue_np = blue @ np_total
+
+    predictions = pd.DataFrame({
+        'Match': [m['match_num'] for m in matches],
+        'Red Teams': [", ".join(m['teams']['red']) for m in matches],
+        'Blue Teams': [", ".join(m['teams']['blue']) for m in matches],
+        'Red Pred NP': red_np,
+        'Red Pred Total': red_np + blue @ penalty,
+        'Blue Pred NP': blue_np,
+        'Blue Pred Total': blue_np + red @ penalty,
+    })
+
+    # Add actual scores if available
+    actual = {name: np.full(n, np.nan) for name in
+              ['Red Act NP', 'Red Act Total', 'Blue Act NP', 'Blue Act Total']}
+    for i, m in enumerate(matches):
+        if m.get('scores'):
+            s = m['scores']
+            actual['Red Act NP'][i] = s['red']['auto'] + s['red']['teleop']
+            actual['Red Act Total'][i] = actual['Red Act NP'][i] + s['blue']['penalty_committed']
+            actual['Blue Act NP'][i] = s['blue']['auto'] + s['blue']['teleop']
+            actual['Blue Act Total'][i] = actual['Blue Act NP'][i] + s['red']['penalty_committed']
+    for name, values in actual.items():
+        predictions[name] = values
+
+    return predictions
+
+def load_event(url):
+    """Fetches the match list of an event and the scores of every played match."""
     all_matches = get_matches_info(url)
     print(f"Found {len(all_matches)} matches.")
     
@@ -240,19 +279,30 @@ def main():
             pass
     
     print(f"Successfully parsed data for {played_count} played matches.")
+    return all_matches, played_count
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    url = "https://ftc-events.firstinspires.org/2025/ILKSQ1/qualifications"
+    url = "https://ftc-events.firstinspires.org/2025/USTXNIM3/qualifications"
+    url = "https://ftc-events.firstinspires.org/2025/ILKSQ2/qualifications/"
+    if len(argv) > 0:
+        url = argv[0]
+        
+    all_matches, played_count = load_event(url)
     
     if played_count == 0:
         print("No played matches found to calculate OPR.")
         return
 
-    results, opr_map = calculate_opr(all_matches)
+    results, opr = calculate_opr(all_matches)
     
     print("\nTeam Contributions (OPR):")
     pd.options.display.float_format = '{:.2f}'.format
     print(results.to_string(index=False))
     
     print("\nMatch Predictions (Actual vs Predicted):")
-    predictions = predict_matches(all_matches, opr_map)
+    predictions = predict_matches(all_matches, opr)
     
     cols = ['Match', 
             'Red Teams', 'Red Act NP', 'Red Pred NP', 'Red Act Total', 'Red Pred Total',
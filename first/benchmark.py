@@ -0,0 +1,128 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from first.analysis import (COMPONENTS, SOLVERS, calculate_opr, opr_system, played_matches, solve_contributions,
+                            team_index)
+
+"""
+OPR Solver Benchmark
+Generates synthetic qualification schedules with known team contributions and
+compares the runtime and accuracy of every calculate_opr solver backend as the
+number of teams and matches grows.
+"""
+
+# Mean true contribution per team of each score component
+COMPONENT_MEANS = {'auto': 15.0, 'teleop': 40.0, 'penalty_committed': 3.0}
+
+def synthetic_event(num_teams, matches_per_team, alliance_size=2, noise=10.0, seed=None):
+    """Builds a qualification schedule with scores drawn from known contributions.
+
+    Every round shuffles the teams into matches of two alliances (padding the last
+    match with surrogate teams) so each team plays matches_per_team matches. Each
+    alliance component score is the sum of its teams' true contributions plus
+    Gaussian noise with SD noise, scaled to the component mean and clipped at zero.
+    Returns (matches in the load_event format, {component key: true contributions}).
+    """
+    per_match = 2 * alliance_size
+    if num_teams < per_match:
+        raise ValueError(f"Need at least {per_match} teams for alliances of {alliance_size}")
+    rng = np.random.default_rng(seed)
+    teams = [str(1000 + i) for i in range(num_teams)]
+    truth = {key: rng.gamma(2.0, mean / 2.0, num_teams) for key, mean in COMPONENT_MEANS.items()}
+
+    matches = []
+    for _ in range(matches_per_team):
+        order = rng.permutation(num_teams)
+        missing = -len(order) % per_match
+        if missing:
+            # Surrogates come from the teams not already in the last, partial match
+            pool = order[:len(order) - (per_match - missing)]
+            surrogates = rng.choice(pool if len(pool) >= missing else order, missing, replace=False)
+            order = np.concatenate([order, surrogates])
+        for start in range(0, len(order), per_match):
+            idx = order[start:start + per_match]
+            alliances = {'red': idx[:alliance_size], 'blue': idx[alliance_size:]}
+            scores = {color: {} for color in alliances}
+            for key, values in truth.items():
+                scale = noise * COMPONENT_MEANS[key] / COMPONENT_MEANS['teleop']
+                for color, members in alliances.items():
+                    score = values[members].sum() + rng.normal(0, scale)
+                    scores[color][key] = max(int(round(score)), 0)
+            matches.append({
+                'match_num': str(len(matches) + 1),
+                'url': None,
+                'teams': {color: [teams[i] for i in members] for color, members in alliances.items()},
+                'scores': scores,
+            })
+    return matches, truth
+
+def benchmark(team_counts=(16, 32, 64, 128, 256), matches_per_team=5, alliance_size=2, noise=10.0,
+              solvers=SOLVERS, ridge_alpha=1.0, repeats=3, seed=0):
+    """Times every solver on synthetic events of each size and scores its accuracy.
+
+    Accuracy is the RMSE of the estimated per-team Total against the true one and
+    the Spearman rank correlation of the two, plus the number of negative component
+    contributions (which only unbounded solvers produce). Time is the best of
+    repeats runs of solving every component on a prebuilt A / b, so matrix
+    construction and the rest of calculate_opr are not included.
+    Returns a DataFrame with one row per (teams, solver).
+    """
+    rows = []
+    for num_teams in team_counts:
+        matches, truth = synthetic_event(num_teams, matches_per_team, alliance_size, noise, seed)
+        true_total = truth['auto'] + truth['teleop'] - truth['penalty_committed']
+        # The same system calculate_opr solves, built once outside the timed region
+        _, team_to_idx = team_index(matches)
+        A, targets = opr_system(played_matches(matches), team_to_idx)
+        for solver in solvers:
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                for b in targets:
+                    solve_contributions(A, b, solver, ridge_alpha)
+                timings.append(time.perf_counter() - start)
+            _, opr = calculate_opr(matches, solver=solver, ridge_alpha=ridge_alpha)
+            # calculate_opr sorts teams numerically, which is the generation order
+            total = opr['Total']
+            rows.append({
+                'Teams': num_teams,
+                'Matches': len(matches),
+                'Solver': solver,
+                'Seconds': min(timings),
+                'Total RMSE': np.sqrt(np.mean((total - true_total) ** 2)),
+                'Rank Corr': pd.Series(total).corr(pd.Series(true_total), method='spearman'),
+                'Negative': int(sum((opr[name] < 0).sum() for name, _ in COMPONENTS)),
+            })
+    return pd.DataFrame(rows)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Compare OPR solver backends on synthetic events.")
+    parser.add_argument("--teams", type=int, nargs="+", default=[16, 32, 64, 128, 256],
+                        help="Event sizes (number of teams) to benchmark.")
+    parser.add_argument("--matches-per-team", type=int, default=5, help="Qualification matches per team.")
+    parser.add_argument("--alliance-size", type=int, default=2, help="Teams per alliance.")
+    parser.add_argument("--noise", type=float, default=10.0, help="Score noise SD (teleop scale).")
+    parser.add_argument("--solvers", nargs="+", choices=SOLVERS, default=SOLVERS, help="Backends to compare.")
+    parser.add_argument("--ridge-alpha", type=float, default=1.0, help="L2 penalty of the ridge solver.")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per solver (best is kept).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Optional CSV file for the results.")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(sys.argv[1:] if argv is None else argv)
+    results = benchmark(args.teams, args.matches_per_team, args.alliance_size, args.noise,
+                        args.solvers, args.ridge_alpha, args.repeats, args.seed)
+
+    pd.options.display.float_format = '{:.4f}'.format
+    print(results.to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"\nSaved benchmark results to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from first.analysis import COMPONENTS, alliance_matrices, calculate_opr, load_event
+
+"""
+FTC Event Monte Carlo Simulation
+Samples alliance scores from each team's OPR contribution and residual spread to
+estimate match win probabilities, ranking points and alliance captain odds.
+"""
+
+DEFAULT_URL = "https://ftc-events.firstinspires.org/2025/ILKSQ2/qualifications/"
+
+def _sample_alliance(rng, alliance, mean, sd, n_sims):
+    """Samples one score component for every match of an alliance, shape (sims, matches).
+
+    Scores are rounded to whole points like real FTC scores, so ties can happen.
+    """
+    mu = alliance @ mean
+    sigma = np.sqrt(alliance @ sd ** 2)
+    return np.maximum(np.rint(rng.normal(mu, sigma, size=(n_sims, len(mu)))), 0)
+
+def _simulate_batch(args):
+    """Simulates a batch of events and returns per-team and per-match outcome sums."""
+    red, blue, contributions, actual, n_sims, seed, win_points, tie_points, num_captains = args
+    rng = np.random.default_rng(seed)
+
+    sampled = {}
+    for name, (mean, sd) in contributions.items():
+        sampled[name] = (_sample_alliance(rng, red, mean, sd, n_sims),
+                         _sample_alliance(rng, blue, mean, sd, n_sims))
+
+    red_np = sampled['Auto'][0] + sampled['Teleop'][0]
+    blue_np = sampled['Auto'][1] + sampled['Teleop'][1]
+    # Penalties committed by one alliance are scored by the other
+    red_total = red_np + sampled['Penalty'][1]
+    blue_total = blue_np + sampled['Penalty'][0]
+
+    if actual is not None:
+        played = actual['played']
+        red_np[:, played] = actual['Red NP']
+        blue_np[:, played] = actual['Blue NP']
+        red_total[:, played] = actual['Red Total']
+        blue_total[:, played] = actual['Blue Total']
+
+    red_win = red_total > blue_total
+    blue_win = blue_total > red_total
+    tie = ~(red_win | blue_win)
+
+    red_rp = win_points * red_win + tie_points * tie
+    blue_rp = win_points * blue_win + tie_points * tie
+    rp = (red.T @ red_rp.T + blue.T @ blue_rp.T).T
+    # Ties on ranking points are broken by the average non-penalty points per match
+    # played, so a surrogate match gives no edge
+    matches_played = np.maximum(np.asarray(red.sum(axis=0) + blue.sum(axis=0)).ravel(), 1)
+    tiebreak = (red.T @ red_np.T + blue.T @ blue_np.T).T / matches_played
+    key = rp + tiebreak / (tiebreak.max() + 1)
+
+    order = np.argsort(-key, axis=1)
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, order.shape[1] + 1)[None, :], axis=1)
+
+    return {
+        'rp': rp.sum(axis=0),
+        'rank': ranks.sum(axis=0),
+        'first': (ranks == 1).sum(axis=0),
+        'captain': (ranks <= num_captains).sum(axis=0),
+        'red_win': red_win.sum(axis=0),
+        'blue_win': blue_win.sum(axis=0),
+        'tie': tie.sum(axis=0),
+    }
+
+def simulate_event(matches, opr, n_sims=10000, processes=1, batch_size=5000, seed=None,
+                   keep_played=True, win_points=2, tie_points=1, num_captains=4):
+    """Runs n_sims Monte Carlo simulations of an event using the OPR from calculate_opr.
+
+    Played matches keep their actual scores unless keep_played is False. Batches of
+    batch_size simulations are spread over a process pool when processes > 1.
+    Returns a team table (mean RP, mean rank, first seed and captain odds) and a
+    match table (win/tie probabilities).
+    """
+    matches = [m for m in matches if m['teams']['red'] or m['teams']['blue']]
+    red, blue = alliance_matrices(matches, opr['index'])
+    contributions = {name: (opr[name], opr[f'{name} SD']) for name, _ in COMPONENTS}
+
+    actual = None
+    if keep_played:
+        played = np.array([bool(m.get('scores')) for m in matches], dtype=bool)
+        scores = [m['scores'] for m in matches if m.get('scores')]
+        red_np = np.array([s['red']['auto'] + s['red']['teleop'] for s in scores], dtype=float)
+        blue_np = np.array([s['blue']['auto'] + s['blue']['teleop'] for s in scores], dtype=float)
+        actual = {
+            'played': played,
+            'Red NP': red_np,
+            'Blue NP': blue_np,
+            'Red Total': red_np + [s['blue']['penalty_committed'] for s in scores],
+            'Blue Total': blue_np + [s['red']['penalty_committed'] for s in scores],
+        }
+
+    sizes = [batch_size] * (n_sims // batch_size)
+    if n_sims % batch_size:
+        sizes.append(n_sims % batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    batches = [(red, blue, contributions, actual, size, batch_seed, win_points, tie_points, num_captains)
+               for size, batch_seed in zip(sizes, seeds)]
+
+    if processes == 1 or len(batches) == 1:
+        outcomes = list(map(_simulate_batch, batches))
+    else:
+        with ProcessPoolExecutor(processes) as pool:
+            outcomes = list(pool.map(_simulate_batch, batches))
+
+    totals = {key: sum(o[key] for o in outcomes) for key in outcomes[0]}
+
+    team_odds = pd.DataFrame({
+        'Team': opr['teams'],
+        'Mean RP': totals['rp'] / n_sims,
+        'Mean Rank': totals['rank'] / n_sims,
+        'Rank 1 Prob': totals['first'] / n_sims,
+        'Captain Prob': totals['captain'] / n_sims,
+    }).sort_values(by='Mean Rank')
+
+    match_odds = pd.DataFrame({
+        'Match': [m['match_num'] for m in matches],
+        'Red Teams': [", ".join(m['teams']['red']) for m in matches],
+        'Blue Teams': [", ".join(m['teams']['blue']) for m in matches],
+        'Red Win Prob': totals['red_win'] / n_sims,
+        'Blue Win Prob': totals['blue_win'] / n_sims,
+        'Tie Prob': totals['tie'] / n_sims,
+    })
+
+    return team_odds, match_odds
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    url = DEFAULT_URL
+    n_sims = 10000
+    if len(argv) > 0:
+        url = argv[0]
+    if len(argv) > 1:
+        n_sims = int(argv[1])
+
+    all_matches, played_count = load_event(url)
+    if played_count == 0:
+        print("No played matches found to calculate OPR.")
+        return
+
+    results, opr = calculate_opr(all_matches)
+
+    print(f"\nSimulating {n_sims} events...")
+    team_odds, match_odds = simulate_event(all_matches, opr, n_sims=n_sims, processes=None)
+
+    pd.options.display.float_format = '{:.3f}'.format
+    print("\nSimulated Rankings:")
+    print(team_odds.to_string(index=False))
+    print("\nMatch Win Probabilities:")
+    print(match_odds.to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -1,80 +1,43 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
 import argparse
-import numpy as np
 
-def main():
+GRAPHS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "health_graphs")
+
+def build_parser():
     parser = argparse.ArgumentParser(description="Generate health analysis health_graphs.")
     parser.add_argument("--countries", nargs="+", help="List of countries to graph (e.g., 'United States' 'China'). If not provided, defaults to a sample set.")
     parser.add_argument("--start-year", type=int, help="Start year for the graph.")
     parser.add_argument("--end-year", type=int, help="End year for the graph.")
-    args = parser.parse_args()
+    return parser
 
-    # Define file paths
-    death_rate_file = "staticData/birth-rate-vs-death-rate/birth-rate-vs-death-rate.csv"
-    health_exp_file = "staticData/life-expectancy-vs-health-expenditure/life-expectancy-vs-health-expenditure.csv"
-    productivity_file = "staticData/productivity.csv"
+def main(argv=None):
+    args = build_parser().parse_args(argv)
 
-    # Check if files exist
-    if not os.path.exists(death_rate_file):
-        print(f"Error: File not found at {death_rate_file}")
-        return
-    if not os.path.exists(health_exp_file):
-        print(f"Error: File not found at {health_exp_file}")
-        return
-    if not os.path.exists(productivity_file):
-        print(f"Error: File not found at {productivity_file}")
-        return
+    # Heavy libraries are imported only after argument parsing so --help stays fast
+    import numpy as np
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+    from matplotlib.colors import to_rgba_array
+    import seaborn as sns
+
+    from health_data import load_panel, select_panel
 
-    # Load data
+    # Load the merged indicator panel (joined once and cached by health_data)
     print("Loading data...")
     try:
-        df_death = pd.read_csv(death_rate_file)
-        df_health = pd.read_csv(health_exp_file)
-        df_prod = pd.read_csv(productivity_file)
+        panel = load_panel()
+    except FileNotFoundError as e:
+        print(f"Error: File not found at {e.filename}")
+        return
     except Exception as e:
         print(f"Error reading CSV files: {e}")
         return
-
-    # Column names
-    col_death_rate = "Death rate - Sex: all - Age: all - Variant: estimates"
-    col_birth_rate = "Birth rate - Sex: all - Age: all - Variant: estimates"
-    col_life_exp = "Life expectancy - Sex: all - Age: 0 - Variant: estimates"
-    col_health_exp = "Health expenditure per capita - Total"
-    
-    # Rename columns for easier handling
-    if col_death_rate in df_death.columns:
-        df_death = df_death.rename(columns={col_death_rate: "death_rate"})
-    if col_birth_rate in df_death.columns:
-        df_death = df_death.rename(columns={col_birth_rate: "birth_rate"})
-    if col_life_exp in df_health.columns:
-        df_health = df_health.rename(columns={col_life_exp: "life_expectancy", col_health_exp: "health_expenditure"})
-
-    df_prod = df_prod.rename(columns={"ref_area.label": "Entity", "time": "Year", "obs_value": "productivity"})
-
-    # Merge datasets on Entity, Code, Year
-    print("Merging data...")
-    df_merged = pd.merge(df_death[["Entity", "Code", "Year", "death_rate", "birth_rate"]],
-                         df_health[["Entity", "Code", "Year", "life_expectancy", "health_expenditure"]],
-                         on=["Entity", "Code", "Year"],
-                         how="inner")
-    
-    # Merge productivity data
-    df_merged = pd.merge(df_merged,
-                         df_prod[["Entity", "Year", "productivity"]],
-                         on=["Entity", "Year"],
-                         how="inner")
-
-    # Filter out rows with missing data for our variables
-    initial_count = len(df_merged)
-    df_merged = df_merged.dropna(subset=["death_rate","birth_rate", "life_expectancy", "health_expenditure", "productivity"])
-    final_count = len(df_merged)
-    print(f"Data points after merging and cleaning: {final_count} (dropped {initial_count - final_count})")
+    print(f"Data points after merging and cleaning: {len(panel)}")
 
     # Filter by Countries
-    available_countries = df_merged["Entity"].unique()
+    available_countries = panel.index.get_level_values("Entity").unique()
     if args.countries:
         selected_countries = args.countries
     else:
@@ -87,13 +50,8 @@ def main():
              selected_countries = available_countries[:5] # Fallback to first 5
         print(f"No countries specified. Defaulting to: {selected_countries}")
  #   selected_countries = available_countries
-    df_filtered = df_merged[df_merged["Entity"].isin(selected_countries)].copy()
-
-    # Filter by Years
-    if args.start_year:
-        df_filtered = df_filtered[df_filtered["Year"] >= args.start_year]
-    if args.end_year:
-        df_filtered = df_filtered[df_filtered["Year"] <= args.end_year]
+    # Filter by Countries and Years
+    df_filtered = select_panel(panel, selected_countries, args.start_year, args.end_year)
 
     if len(df_filtered) == 0:
         print("No data found for the specified criteria.")
@@ -121,39 +79,39 @@ def main():
 
     # Plotting
     print("Generating graph...")
-    plt.figure(figsize=(12, 8))
     sns.set_theme(style="whitegrid")
-    # Line plot with markers
-    # Plotting trajectory: X = Metric, Y = Life Expectancy, Hue = Country
-    sns.lineplot(
-        data=df_filtered,
-        x="hours_of_effort",
-        y="life_expectancy",
-        hue="Entity",
-        marker="o", # Show points
-        sort=False, # Already sorted by year
-        palette=palette
-    )
-   # plt.gca().set_xscale("log")
-
-    # Optional: Add annotations for Start and End years
-    for country in df_filtered["Entity"].unique():
-        country_data = df_filtered[df_filtered["Entity"] == country]
-        if len(country_data) > 0:
-            # Label end
-            end_row = country_data.iloc[-1]
-            plt.text(end_row["hours_of_effort"], end_row["life_expectancy"], str(end_row["Entity"] ), fontsize=14, alpha=0.7)
+    fig, ax = plt.subplots(figsize=(12, 8))
+
+    # Group once: rows are sorted by Entity, so each country is a contiguous run
+    entities = df_filtered["Entity"].to_numpy()
+    points = df_filtered[["hours_of_effort", "life_expectancy"]].to_numpy()
+    starts = np.flatnonzero(np.r_[True, entities[1:] != entities[:-1]])
+    trajectories = np.split(points, starts[1:])
+    colors = to_rgba_array([palette[country] for country in entities[starts]])
+
+    # Plotting trajectory: X = Metric, Y = Life Expectancy, one line per country
+    ax.add_collection(LineCollection(trajectories, colors=colors, linewidths=1.5))
+    ax.scatter(points[:, 0], points[:, 1], c=np.repeat(colors, np.diff(np.r_[starts, len(points)]), axis=0),
+               s=36, edgecolors="white", linewidths=0.75, zorder=3)
+    ax.autoscale_view()
+   # ax.set_xscale("log")
+
+    # Label the end (latest year) of each trajectory
+    end_rows = df_filtered.groupby("Entity", observed=True, sort=False).tail(1)
+    for _, end_row in end_rows.iterrows():
+        ax.text(end_row["hours_of_effort"], end_row["life_expectancy"], str(end_row["Entity"]), fontsize=14, alpha=0.7)
 
 
     plt.title(f"Life Expectancy vs. Hours of Effort ({df_filtered["Year"].min()} - {df_filtered["Year"].max()})")
     plt.xlabel(f"Hours of Effort per unit of effort (death = {death_expense_vs_birth} units, birth = 1 unit)")
     plt.ylabel("Life Expectancy (Years)")
-    plt.gca().get_legend().remove()
     plt.tight_layout()
 
     # Save plot
-    output_file = os.path.join("health_graphs", f"health_graph_{death_expense_vs_birth}.png")
+    os.makedirs(GRAPHS_DIR, exist_ok=True)
+    output_file = os.path.join(GRAPHS_DIR, f"health_graph_{death_expense_vs_birth}.png")
     plt.savefig(output_file)
+    plt.close(fig)
     print(f"Graph saved to {output_file}")
 
 if __name__ == "__main__":
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow.feather as feather
+
+"""
+Shared loader for the OWID / ILO indicator CSVs used by health.py and main.py.
+Each source is parsed once into a typed Feather file under staticData/.cache and
+re-read with memory mapping until the source CSV changes; the merged panel is
+materialized next to them.
+"""
+
+# Data paths are relative to the repository so the commands work from any directory
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(ROOT_DIR, "staticData")
+CACHE_DIR = os.path.join(DATA_DIR, ".cache")
+
+# name -> (csv path, {source column: cached column})
+SOURCES = {
+    "death": (
+        os.path.join(DATA_DIR, "birth-rate-vs-death-rate/birth-rate-vs-death-rate.csv"),
+        {
+            "Entity": "Entity",
+            "Code": "Code",
+            "Year": "Year",
+            "Death rate - Sex: all - Age: all - Variant: estimates": "death_rate",
+            "Birth rate - Sex: all - Age: all - Variant: estimates": "birth_rate",
+        },
+    ),
+    "health": (
+        os.path.join(DATA_DIR, "life-expectancy-vs-health-expenditure/life-expectancy-vs-health-expenditure.csv"),
+        {
+            "Entity": "Entity",
+            "Code": "Code",
+            "Year": "Year",
+            "Life expectancy - Sex: all - Age: 0 - Variant: estimates": "life_expectancy",
+            "Health expenditure per capita - Total": "health_expenditure",
+        },
+    ),
+    "productivity": (
+        os.path.join(DATA_DIR, "productivity.csv"),
+        {"ref_area.label": "Entity", "time": "Year", "obs_value": "productivity"},
+    ),
+}
+
+PANEL_COLUMNS = ["death_rate", "birth_rate", "life_expectancy", "health_expenditure", "productivity"]
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_is_fresh(csv_path, cache_path, meta_path):
+    """Checks the cached copy against the source mtime/size, falling back to its hash."""
+    if not (os.path.exists(cache_path) and os.path.exists(meta_path)):
+        return False
+    with open(meta_path) as f:
+        meta = json.load(f)
+    stat = os.stat(csv_path)
+    if meta["mtime"] == stat.st_mtime_ns and meta["size"] == stat.st_size:
+        return True
+    if meta["sha256"] != _file_hash(csv_path):
+        return False
+    # Touched but unchanged: remember the new mtime so the hash is skipped next time
+    meta["mtime"] = stat.st_mtime_ns
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    return True
+
+
+def _build_cache(csv_path, columns, cache_path, meta_path):
+    """Parses the CSV once into compact dtypes and writes it as uncompressed Feather."""
+    df = pd.read_csv(csv_path, usecols=list(columns)).rename(columns=columns)
+    for col in df.columns:
+        if col in ("Entity", "Code"):
+            df[col] = df[col].astype("category")
+        elif col == "Year":
+            df[col] = df[col].astype("int16")
+        else:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float32")
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    # Uncompressed so the file can be memory mapped on load
+    feather.write_feather(df, cache_path, compression="uncompressed")
+    stat = os.stat(csv_path)
+    with open(meta_path, "w") as f:
+        json.dump({"mtime": stat.st_mtime_ns, "size": stat.st_size, "sha256": _file_hash(csv_path)}, f)
+
+
+def _ensure_cache(name):
+    """Rebuilds the cache of one source if stale and returns (cache path, source hash)."""
+    csv_path, column_map = SOURCES[name]
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(2, "File not found", csv_path)
+
+    cache_path = os.path.join(CACHE_DIR, f"{name}.feather")
+    meta_path = os.path.join(CACHE_DIR, f"{name}.json")
+    if not _cache_is_fresh(csv_path, cache_path, meta_path):
+        print(f"Parsing {csv_path}...")
+        _build_cache(csv_path, column_map, cache_path, meta_path)
+
+    with open(meta_path) as f:
+        return cache_path, json.load(f)["sha256"]
+
+
+def load_source(name, columns=None):
+    """Loads one source table with renamed columns, rebuilding its cache only when the CSV changed.
+
+    columns optionally restricts the result to the given (renamed) columns.
+    Raises FileNotFoundError if the source CSV is missing.
+    """
+    cache_path, _ = _ensure_cache(name)
+    table = feather.read_table(cache_path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+def _build_panel():
+    """Joins the three sources on Entity/Code/Year and drops incomplete rows."""
+    df_death = load_source("death")
+    df_health = load_source("health")
+    df_prod = load_source("productivity")
+
+    df_merged = pd.merge(df_death, df_health, on=["Entity", "Code", "Year"], how="inner")
+    df_merged = pd.merge(df_merged, df_prod, on=["Entity", "Year"], how="inner")
+    df_merged = df_merged.dropna(subset=PANEL_COLUMNS)
+
+    # Merging categoricals with different categories falls back to object
+    for col in ("Entity", "Code"):
+        df_merged[col] = df_merged[col].astype("category")
+    return df_merged.sort_values(by=["Entity", "Year"], ignore_index=True)
+
+
+def load_panel():
+    """Loads the merged indicator panel indexed by (Entity, Year).
+
+    The panel is materialized under CACHE_DIR and only re-joined when one of the
+    source CSVs changed, in which case only the changed sources are re-parsed.
+    """
+    source_hashes = {name: _ensure_cache(name)[1] for name in SOURCES}
+
+    panel_path = os.path.join(CACHE_DIR, "panel.feather")
+    meta_path = os.path.join(CACHE_DIR, "panel.json")
+    fresh = False
+    if os.path.exists(panel_path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            fresh = json.load(f) == source_hashes
+
+    if not fresh:
+        print("Merging data...")
+        feather.write_feather(_build_panel(), panel_path, compression="uncompressed")
+        with open(meta_path, "w") as f:
+            json.dump(source_hashes, f)
+
+    panel = feather.read_table(panel_path, memory_map=True).to_pandas()
+    return panel.set_index(["Entity", "Year"]).sort_index()
+
+
+def select_panel(panel, countries=None, start_year=None, end_year=None):
+    """Slices the panel by country list and inclusive year range; returns a flat frame."""
+    entities = panel.index.get_level_values("Entity").unique()
+    if countries is not None:
+        entities = [c for c in countries if c in entities]
+    selected = panel.loc[pd.IndexSlice[list(entities), start_year:end_year], :].reset_index()
+    # Keep plotting hues limited to the selected countries
+    selected["Entity"] = selected["Entity"].cat.remove_unused_categories()
+    return selected
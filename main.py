@@ -1,107 +1,40 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
 import argparse
-import numpy as np
-
-def main():
-    parser = argparse.ArgumentParser(description="Generate health analysis health_graphs.")
-    parser.add_argument("--countries", nargs="+", help="List of countries to graph (e.g., 'United States' 'China'). If not provided, defaults to a sample set.")
-    parser.add_argument("--start-year", type=int, help="Start year for the graph.")
-    parser.add_argument("--end-year", type=int, help="End year for the graph.")
-    args = parser.parse_args()
-
-    # Define file paths
-    death_rate_file = "staticData/birth-rate-vs-death-rate/birth-rate-vs-death-rate.csv"
-    health_exp_file = "staticData/life-expectancy-vs-health-expenditure/life-expectancy-vs-health-expenditure.csv"
-    productivity_file = "staticData/productivity.csv"
-
-    # Check if files exist
-    if not os.path.exists(death_rate_file):
-        print(f"Error: File not found at {death_rate_file}")
-        return
-    if not os.path.exists(health_exp_file):
-        print(f"Error: File not found at {health_exp_file}")
-        return
-    if not os.path.exists(productivity_file):
-        print(f"Error: File not found at {productivity_file}")
-        return
-
-    # Load data
-    print("Loading data...")
-    try:
-        df_death = pd.read_csv(death_rate_file)
-        df_health = pd.read_csv(health_exp_file)
-        df_prod = pd.read_csv(productivity_file)
-    except Exception as e:
-        print(f"Error reading CSV files: {e}")
-        return
-
-    # Column names
-    col_death_rate = "Death rate - Sex: all - Age: all - Variant: estimates"
-    col_birth_rate = "Birth rate - Sex: all - Age: all - Variant: estimates"
-    col_life_exp = "Life expectancy - Sex: all - Age: 0 - Variant: estimates"
-    col_health_exp = "Health expenditure per capita - Total"
-    
-    # Rename columns for easier handling
-    if col_death_rate in df_death.columns:
-        df_death = df_death.rename(columns={col_death_rate: "death_rate"})
-    if col_birth_rate in df_death.columns:
-        df_death = df_death.rename(columns={col_birth_rate: "birth_rate"})
-    if col_life_exp in df_health.columns:
-        df_health = df_health.rename(columns={col_life_exp: "life_expectancy", col_health_exp: "health_expenditure"})
-
-    df_prod = df_prod.rename(columns={"ref_area.label": "Entity", "time": "Year", "obs_value": "productivity"})
-
-    # Merge datasets on Entity, Code, Year
-    print("Merging data...")
-    df_merged = pd.merge(df_death[["Entity", "Code", "Year", "death_rate", "birth_rate"]],
-                         df_health[["Entity", "Code", "Year", "life_expectancy", "health_expenditure"]],
-                         on=["Entity", "Code", "Year"],
-                         how="inner")
-    
-    # Merge productivity data
-    df_merged = pd.merge(df_merged,
-                         df_prod[["Entity", "Year", "productivity"]],
-                         on=["Entity", "Year"],
-                         how="inner")
-
-    # Filter out rows with missing data for our variables
-    initial_count = len(df_merged)
-    df_merged = df_merged.dropna(subset=["death_rate","birth_rate", "life_expectancy", "health_expenditure", "productivity"])
-    final_count = len(df_merged)
-    print(f"Data points after merging and cleaning: {final_count} (dropped {initial_count - final_count})")
-
-    # Filter by Countries
-    available_countries = df_merged["Entity"].unique()
-    if args.countries:
-        selected_countries = args.countries
-    else:
-        defaults = ["United States", "China", "India", "Germany", "Brazil", "Nigeria"]
-        selected_countries = [c for c in defaults if c in available_countries]
-        if not selected_countries:
-             selected_countries = available_countries[:5] # Fallback to first 5
-        print(f"No countries specified. Defaulting to: {selected_countries}")
-    
-    selected_countries = available_countries
-    df_filtered = df_merged[df_merged["Entity"].isin(selected_countries)].copy()
-
-    # Filter by Years
-    if args.start_year:
-        df_filtered = df_filtered[df_filtered["Year"] >= args.start_year]
-    if args.end_year:
-        df_filtered = df_filtered[df_filtered["Year"] <= args.end_year]
-
-    if len(df_filtered) == 0:
-        print("No data found for the specified criteria.")
-        return
-
-    # Calculate metric
-    death_expense_vs_birth = 4
-    df_filtered["effort"] = (death_expense_vs_birth*df_filtered["death_rate"]) + df_filtered["birth_rate"]
-    df_filtered["expenditure_per_event"] = 1000*df_filtered["health_expenditure"] / df_filtered["effort"]
-    df_filtered["hours_of_effort"] = df_filtered["expenditure_per_event"] / df_filtered["productivity"]
+from concurrent.futures import ProcessPoolExecutor
+
+GRAPHS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "health_graphs")
+
+# numpy, matplotlib, seaborn and the data layer are imported inside the functions
+# that use them so that --help and argument errors return immediately
+
+def compute_metrics(df, weights):
+    """Computes effort, expenditure_per_event and hours_of_effort for every weight in one pass.
+
+    Returns df repeated once per distinct weight (in the given order) with a
+    'death_expense_vs_birth' column.
+    """
+    import numpy as np
+
+    # Repeated weights would merge into one group with every row duplicated
+    weights = np.asarray(list(dict.fromkeys(float(w) for w in weights)))[:, None]
+    effort = weights * df["death_rate"].to_numpy() + df["birth_rate"].to_numpy()
+    expenditure_per_event = 1000 * df["health_expenditure"].to_numpy() / effort
+    hours_of_effort = expenditure_per_event / df["productivity"].to_numpy()
+
+    df_metrics = df.iloc[np.tile(np.arange(len(df)), len(weights))].reset_index(drop=True)
+    df_metrics["death_expense_vs_birth"] = np.repeat(weights.ravel(), len(df))
+    df_metrics["effort"] = effort.ravel()
+    df_metrics["expenditure_per_event"] = expenditure_per_event.ravel()
+    df_metrics["hours_of_effort"] = hours_of_effort.ravel()
+    return df_metrics
+
+def render_graph(df_filtered, death_expense_vs_birth, output_file):
+    """Draws the life expectancy vs. hours of effort graph for one weight and saves it."""
+    import numpy as np
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
     # Sort by Year to ensure lines are drawn correctly
     df_filtered = df_filtered.sort_values(by=["Entity", "Year"])
@@ -147,15 +80,99 @@ def main():
     plt.gca().set_yticklabels([str(t) for t in y_ticks])
 
     plt.title(f"Life Expectancy vs. Hours of Effort ({df_filtered['Year'].min()} - {df_filtered['Year'].max()})")
-    plt.xlabel(f"Hours of Effort per birth event (normalized with cost of {death_expense_vs_birth} births = 1 death)")
+    plt.xlabel(f"Hours of Effort per birth event (normalized with cost of {death_expense_vs_birth:g} births = 1 death)")
     plt.ylabel("Life Expectancy (Years) - Log scale relative to 85")
     plt.gca().get_legend().remove()
     plt.tight_layout()
 
     # Save plot
-    output_file = os.path.join("health_graphs", f"health_graph_{death_expense_vs_birth}.png")
     plt.savefig(output_file)
+    plt.close()
     print(f"Graph saved to {output_file}")
+    return output_file
+
+def year_range(value):
+    """Parses START-END or a single YEAR into a (start, end) tuple for argparse."""
+    start, _, end = value.partition("-")
+    try:
+        start, end = int(start), int(end or start)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YEAR or START-END, got {value!r}")
+    if start > end:
+        raise argparse.ArgumentTypeError(f"start year is after end year in {value!r}")
+    return start, end
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Generate health analysis health_graphs.")
+    parser.add_argument("--countries", nargs="+", help="List of countries to graph (e.g., 'United States' 'China'). If not provided, defaults to a sample set.")
+    parser.add_argument("--start-year", type=int, help="Start year for the graph.")
+    parser.add_argument("--end-year", type=int, help="End year for the graph.")
+    parser.add_argument("--weights", nargs="+", type=float, default=[4], help="Cost of a death in births (death_expense_vs_birth); one graph per weight.")
+    parser.add_argument("--country-group", action="append", help="Comma separated countries graphed together (e.g. 'Israel,Germany'). Repeat for several groups.")
+    parser.add_argument("--year-range", action="append", type=year_range, help="Year range as START-END (e.g. 1995-2015) or a single YEAR. Repeat for several ranges; overrides --start-year/--end-year.")
+    parser.add_argument("--workers", type=int, help="Number of processes rendering graphs (defaults to one per CPU).")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    from health_data import load_panel, select_panel
+
+    # Load the merged indicator panel (joined once and cached by health_data)
+    print("Loading data...")
+    try:
+        panel = load_panel()
+    except FileNotFoundError as e:
+        print(f"Error: File not found at {e.filename}")
+        return
+    except Exception as e:
+        print(f"Error reading CSV files: {e}")
+        return
+    print(f"Data points after merging and cleaning: {len(panel)}")
+
+    # Filter by Countries
+    available_countries = panel.index.get_level_values("Entity").unique()
+    if args.countries:
+        selected_countries = args.countries
+    else:
+        defaults = ["United States", "China", "India", "Germany", "Brazil", "Nigeria"]
+        selected_countries = [c for c in defaults if c in available_countries]
+        if not selected_countries:
+             selected_countries = available_countries[:5] # Fallback to first 5
+        print(f"No countries specified. Defaulting to: {selected_countries}")
+    
+    selected_countries = available_countries
+
+    # Parameter sweep: every country group x year range x weight gets a graph
+    country_groups = [g.split(",") for g in args.country_group] if args.country_group else [selected_countries]
+    year_ranges = args.year_range if args.year_range else [(args.start_year, args.end_year)]
+    sweep = len(country_groups) > 1 or len(year_ranges) > 1
+
+    jobs = []
+    for group_idx, countries in enumerate(country_groups):
+        for start_year, end_year in year_ranges:
+            # Filter by Countries and Years
+            df_filtered = select_panel(panel, countries, start_year, end_year)
+            if len(df_filtered) == 0:
+                print(f"No data found for the specified criteria (group {group_idx}, years {start_year}-{end_year}).")
+                continue
+
+            # Calculate metrics for all weights at once
+            df_metrics = compute_metrics(df_filtered, args.weights)
+            for death_expense_vs_birth, df_weight in df_metrics.groupby("death_expense_vs_birth"):
+                name = f"health_graph_{death_expense_vs_birth:g}"
+                if sweep:
+                    name += f"_group{group_idx}_{start_year}-{end_year}"
+                jobs.append((df_weight, death_expense_vs_birth, os.path.join(GRAPHS_DIR, f"{name}.png")))
+
+    if not jobs:
+        return
+    os.makedirs(GRAPHS_DIR, exist_ok=True)
+    if len(jobs) == 1:
+        render_graph(*jobs[0])
+        return
+    with ProcessPoolExecutor(args.workers) as pool:
+        list(pool.map(render_graph, *zip(*jobs)))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
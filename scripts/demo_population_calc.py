@@ -1,21 +1,22 @@
 import os
-import requests
 import geopandas as gpd
 from rasterstats import zonal_stats
 from shapely.geometry import Polygon
 
+from src.worldpop import DATA_DIR, download_file, raster_filename, raster_url
+
+# Run from the repository root: python -m scripts.demo_population_calc
+
 # Configuration
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'staticData')
 ISO_CODE = 'LUX'
 YEAR = 2010
 # Using 1km resolution for smaller file size in this demo
-RASTER_FILENAME = f'{ISO_CODE.lower()}_ppp_{YEAR}_1km_Aggregated.tif'
+RASTER_FILENAME = raster_filename(ISO_CODE, YEAR)
 RASTER_PATH = os.path.join(DATA_DIR, RASTER_FILENAME)
-# WorldPop URL structure
-DOWNLOAD_URL = f"https://data.worldpop.org/GIS/Population/Global_2000_2020/{YEAR}/{ISO_CODE}/{RASTER_FILENAME}"
+DOWNLOAD_URL = raster_url(ISO_CODE, YEAR)
 
 def ensure_data_exists():
-    """Checks if the raster file exists, otherwise downloads it."""
+    """Checks if the raster file exists, otherwise downloads (or resumes) it."""
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
         
@@ -23,11 +24,7 @@ def ensure_data_exists():
         print(f"Dataset not found. Downloading {RASTER_FILENAME} from WorldPop...")
         print(f"URL: {DOWNLOAD_URL}")
         try:
-            response = requests.get(DOWNLOAD_URL, stream=True)
-            response.raise_for_status()
-            with open(RASTER_PATH, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            download_file(DOWNLOAD_URL, RASTER_PATH)
             print("Download complete.")
         except Exception as e:
             print(f"Error downloading file: {e}")
@@ -8,8 +8,11 @@ from rasterio.plot import show
 import matplotlib.colors as mcolors
 import json
 from rasterio.mask import mask
+
+from src.chunked import chunked_sums
 raster_path = "/home/simon/PycharmProjects/DataAnalysisGraphs/staticData/ukr_ppp_2010.tif"
-def main():
+def main(memory_budget=None):
+    """Population per fill colour; with memory_budget (bytes) the raster is summed tile by tile and not plotted."""
 
     #polygons = get_polygons()
 
@@ -22,6 +25,10 @@ def main():
     gdf["fills"]=polygons_fills
 
     unique_fills = gdf["fills"].unique()
+    if memory_budget is not None:
+        geometries = {fill: gdf[gdf["fills"] == fill].geometry.union_all() for fill in unique_fills}
+        with rasterio.open(raster_path) as src:
+            return chunked_sums(src, geometries, memory_budget)
     totals = {}
     fig, ax = plt.subplots(1, 1, figsize=(10, 10))
     totals_2 = {}
@@ -0,0 +1,36 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Measures how long `dataanalysisgraphs <command> --help` takes to start and fails
+# when any command exceeds the budget (i.e. a heavy import leaked to module top).
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMMANDS = ["population", "health", "sweep", "opr", "simulate"]
+BUDGET_SECONDS = 0.25
+RUNS = 5
+
+def time_command(command):
+    """Returns the median wall time of `python -m dataanalysisgraphs_cli <command> --help` over RUNS runs."""
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "dataanalysisgraphs_cli", command, "--help"], cwd=ROOT_DIR,
+                       stdout=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def main():
+    over_budget = False
+    for command in COMMANDS:
+        elapsed = time_command(command)
+        status = "ok" if elapsed <= BUDGET_SECONDS else "OVER BUDGET"
+        over_budget |= elapsed > BUDGET_SECONDS
+        print(f"{command:<12}{elapsed * 1000:8.1f} ms  {status}")
+    print(f"Budget: {BUDGET_SECONDS * 1000:.0f} ms")
+    return 1 if over_budget else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
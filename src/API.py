@@ -1,3 +1,4 @@
+import os
 import requests
 import json
 
@@ -47,5 +48,6 @@ def get_polygons(time=None):
 if __name__ == "__main__":
     polygons = get_polygons()
 
-    with open('../scripts/data.json', 'w') as f:
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(root_dir, 'scripts', 'data.json'), 'w') as f:
         json.dump(polygons, f, indent=4)
@@ -0,0 +1,74 @@
+import math
+
+import numpy as np
+import shapely
+from rasterio.features import geometry_mask
+from rasterio.warp import transform_geom
+from rasterio.windows import Window, bounds
+from shapely.geometry import box, mapping, shape
+
+from src.mask_cache import coverage_fractions
+
+# Default peak memory for one tile and its masks
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+
+def bytes_per_cell(src, exact=False):
+    """Peak bytes held per tile cell while summing, for the masking mode in use."""
+    itemsize = np.dtype(src.dtypes[0]).itemsize
+    # Read data + nodata mask, its zero filled copy and the float64 values
+    cell = 2 * itemsize + 1 + 8
+    if exact:
+        # Inside and boundary masks, their combination, float32 weights and the float64 product
+        return cell + 3 + 4 + 8
+    # Inside mask and the selected float64 values
+    return cell + 1 + 8
+
+
+def tile_windows(src, memory_budget=DEFAULT_MEMORY_BUDGET, exact=False):
+    """Splits src into windows aligned to its blocks that fit memory_budget bytes each."""
+    per_cell = bytes_per_cell(src, exact)
+    block_height, block_width = src.block_shapes[0]
+    side = int(math.sqrt(memory_budget / per_cell))
+    width = min(src.width, max(block_width, side // block_width * block_width))
+    height = max(block_height, memory_budget // (per_cell * width) // block_height * block_height)
+    return [Window(col, row, min(width, src.width - col), min(height, src.height - row))
+            for row in range(0, src.height, height) for col in range(0, src.width, width)]
+
+
+def chunked_sums(src, geometries, memory_budget=DEFAULT_MEMORY_BUDGET, exact=False):
+    """Sums the valid pixels of src inside each geometry (EPSG:4326) one tile at a time.
+
+    An index of the tile bounds gives the tiles each geometry intersects, so tiles
+    outside every geometry are never read and tiles fully inside a geometry are
+    summed without rasterizing it. Every tile is read once for all geometries and
+    peak memory stays around memory_budget bytes whatever the raster size.
+    exact=True weights boundary cells by their covered fraction. Returns
+    {name: sum}.
+    """
+    windows = tile_windows(src, memory_budget, exact)
+    tree = shapely.STRtree([box(*bounds(window, src.transform)) for window in windows])
+
+    totals = dict.fromkeys(geometries, 0.0)
+    # tile index -> [(name, geometry, fully inside)]
+    work = {}
+    for name, geometry in geometries.items():
+        geom = shape(transform_geom("EPSG:4326", src.crs, mapping(geometry)))
+        inside = set(tree.query(geom, predicate="contains").tolist())
+        for tile in tree.query(geom, predicate="intersects").tolist():
+            work.setdefault(tile, []).append((name, geom, tile in inside))
+
+    for tile in sorted(work):
+        window = windows[tile]
+        data = src.read(1, window=window, masked=True)
+        valid = np.where(np.ma.getmaskarray(data), 0, data.data).astype(np.float64)
+        transform = src.window_transform(window)
+        for name, geom, full in work[tile]:
+            if full:
+                totals[name] += valid.sum()
+            elif exact:
+                totals[name] += (valid * coverage_fractions(geom, transform, valid.shape)).sum()
+            else:
+                inside = geometry_mask([mapping(geom)], out_shape=valid.shape, transform=transform, invert=True)
+                totals[name] += valid[inside].sum()
+    return {name: float(total) for name, total in totals.items()}
@@ -1,56 +1,152 @@
+import hashlib
 import json
 import os
 from datetime import datetime, timezone
 
 import pandas as pd
 
-import API
-from sum_polygons import sum_polygon
+from src import API
+from src.sum_polygons import ROOT_DIR, occupied_polygons, russian_fills, sum_polygon
+from src.chunked import chunked_sums
+from src.raster_stack import build_stack, stack_population
+from src.results_store import append_results, results_frame
+from src.worldpop import download_rasters
+from src.zonal import population_sums
 import rasterio
 
 
-
-def main(UN=True):
-
-
-    if UN:
-        raster_path = "../staticData/ukr_ppp_2010_UNadj.tif"
-    else:
-        raster_path = "../staticData/ukr_ppp_2010.tif"
-
-    times = API.get_times()
-
-    # Select the first available timestamp for each month (UTC)
+def select_times(times, resolution="month"):
+    """Selects the first available timestamp per "month" or "day" (UTC), or every snapshot ("all")."""
     # Keep the original type (likely str) for API calls/filenames
     selected_times = []
-    seen_months = set()  # (year, month)
+    seen_periods = set()  # (year, month) or (year, month, day)
     for t in sorted(times, key=lambda x: int(x)):
         dt = datetime.fromtimestamp(int(t), tz=timezone.utc)
-        ym = (dt.year, dt.month)
-        if (t >= 1664627935) and (ym not in seen_months):
-            seen_months.add(ym)
+        if resolution == "month":
+            period = (dt.year, dt.month)
+        elif resolution == "day":
+            period = (dt.year, dt.month, dt.day)
+        else:
+            period = t
+        if (int(t) >= 1664627935) and (period not in seen_periods):
+            seen_periods.add(period)
             selected_times.append(t)
+    return selected_times
+
+
+def load_polygons(start_time):
+    """Reads a snapshot from pulled_data, fetching and saving it first if needed."""
+    file_path = os.path.join(ROOT_DIR, "pulled_data", f"{start_time}.json")
+    if os.path.exists(file_path):
+        with open(file_path, "r") as f:
+            return json.load(f)
+    polygons = API.get_polygons(start_time)
+    json.dump(polygons, open(file_path, "w"), indent=4)
+    return polygons
+
+
+def occupied_hash(polygons):
+    """Order independent hash of the occupied polygons of a snapshot (before any union)."""
+    occupied = sorted(json.dumps(item[1]) for item in polygons if item[0] in russian_fills)
+    return hashlib.sha256("\n".join(occupied).encode()).hexdigest()
+
+
+def changed_snapshots(selected_times):
+    """Maps every snapshot to the hash of its occupied geometry.
+
+    Returns (hash per snapshot, {hash: polygons}) so each distinct geometry is
+    processed once and unchanged snapshots reuse its result.
+    """
+    hashes = {}
+    unique = {}
+    for start_time in selected_times:
+        polygons = load_polygons(start_time)
+        geometry_hash = occupied_hash(polygons)
+        hashes[start_time] = geometry_hash
+        unique.setdefault(geometry_hash, polygons)
+    print(f"{len(selected_times)} snapshots, {len(unique)} distinct occupied geometries.")
+    return hashes, unique
+
+
+def population_by_year(selected_times, years, countries=("UKR",), UN=True, exact=False, memory_budget=None):
+    """Occupied population of every snapshot against the WorldPop rasters of each year.
+
+    With memory_budget (bytes) every raster is summed tile by tile instead of
+    reading whole geometry windows. Returns a DataFrame with one row per snapshot
+    and one column per year.
+    """
+    rasters = download_rasters([(iso, year) for iso in countries for year in years],
+                               resolution="100m", un_adjusted=UN)
+    for key, result in rasters.items():
+        if isinstance(result, Exception):
+            print(f"Skipping raster {key}: {result}")
+    rasters = {key: path for key, path in rasters.items() if not isinstance(path, Exception)}
+    if not rasters:
+        raise IOError(f"No WorldPop raster could be downloaded for {', '.join(countries)} in years {list(years)}")
+
+    hashes, unique = changed_snapshots(selected_times)
+    geometries = {h: occupied_polygons(polygons).geometry.union_all() for h, polygons in unique.items()}
+    if memory_budget is not None:
+        by_geometry = pd.DataFrame(0.0, index=list(geometries), columns=sorted({year for _, year in rasters}))
+        for (_, year), path in rasters.items():
+            with rasterio.open(path) as src:
+                by_geometry[year] += pd.Series(chunked_sums(src, geometries, memory_budget, exact=exact))
+        return by_geometry.loc[list(hashes.values())].set_axis(list(hashes), axis=0)
+    if len(countries) > 1:
+        by_geometry = population_sums(geometries, rasters, exact=exact)
+        return by_geometry.loc[list(hashes.values())].set_axis(list(hashes), axis=0)
+
+    # Single country: stack the years as bands so each snapshot is rasterized once
+    iso = countries[0]
+    rasters_by_year = {year: path for (_, year), path in rasters.items()}
+    variant = "_UNadj" if UN else ""
+    stack_path = os.path.join(ROOT_DIR, "staticData",
+                              f"{iso.lower()}_ppp_{min(rasters_by_year)}-{max(rasters_by_year)}{variant}_stack.tif")
+    build_stack(rasters_by_year, stack_path)
+    by_geometry = stack_population(stack_path, geometries, exact=exact)
+    return by_geometry.loc[list(hashes.values())].set_axis(list(hashes), axis=0)
+
+
+def main(UN=True, years=None, countries=("UKR",), resolution="month", draw_images=True, exact=False,
+         memory_budget=None):
 
-    totals = {}
-    with rasterio.open(raster_path) as src:
-        for start_time in selected_times:
-
-
-            file_path = f"../pulled_data/{start_time}.json"
-            if os.path.exists(file_path):
-                with open(file_path, "r") as f:
-                    polygons = json.load(f)
-            else:
-                polygons = API.get_polygons(start_time)
-                json.dump(polygons, open(file_path, "w"), indent=4)
-
-
-            totals[start_time]=sum_polygon(polygons,src,[],draw_image=True,title=str(start_time))
-
-    pop_totals = pd.DataFrame.from_dict(totals)
 
+    if UN:
+        raster_path = os.path.join(ROOT_DIR, "staticData", "ukr_ppp_2010_UNadj.tif")
+    else:
+        raster_path = os.path.join(ROOT_DIR, "staticData", "ukr_ppp_2010.tif")
 
-    pop_totals.to_csv("totals_buffers.csv")
+    times = API.get_times()
+    # Per-snapshot processing only happens for changed geometries, so "day" / "all"
+    # cost is proportional to the number of real frontline changes
+    selected_times = select_times(times, resolution)
+
+    params = {"exact": exact}
+    if years:
+        pop_by_year = population_by_year(selected_times, years, countries, UN, exact, memory_budget)
+        variant = "_UNadj" if UN else ""
+        for year in pop_by_year.columns:
+            raster = f"{'+'.join(countries).lower()}_ppp_{year}{variant}"
+            totals = {start_time: {"pop": value} for start_time, value in pop_by_year[year].items()}
+            append_results(results_frame(totals, raster, params))
+        return pop_by_year
+
+    hashes, unique = changed_snapshots(selected_times)
+    if memory_budget is not None and draw_images:
+        print("Population maps need the full raster in memory, not drawing them with a memory budget.")
+        draw_images = False
+    results = {}
+    with rasterio.open(raster_path) as src:
+        for start_time, geometry_hash in hashes.items():
+            if geometry_hash not in results:
+                results[geometry_hash]=sum_polygon(unique[geometry_hash],src,[],draw_image=draw_images,title=str(start_time),exact=exact,
+                                                       memory_budget=memory_budget)
+    totals = {start_time: results[geometry_hash] for start_time, geometry_hash in hashes.items()}
+
+    # Appended to the results store (see src/results_store.query_results) instead of a rewritten CSV
+    raster = os.path.splitext(os.path.basename(raster_path))[0]
+    append_results(results_frame(totals, raster, params))
+    return pd.DataFrame.from_dict(totals)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,124 @@
+import hashlib
+import os
+
+import numpy as np
+import shapely
+from rasterio.errors import WindowError
+from rasterio.features import geometry_mask, geometry_window
+from rasterio.windows import Window
+from shapely.geometry import mapping, shape
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(ROOT_DIR, "cache", "masks")
+# Least recently used masks are evicted once the cache grows past this size
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+# Bumped whenever the rasterization changes so stale masks are not reused
+MASK_VERSION = 2
+
+
+def mask_key(geometry, src, all_touched=False, exact=False):
+    """Hash of the geometry WKB and the raster grid it is rasterized onto."""
+    digest = hashlib.sha256(geometry.wkb)
+    grid = (MASK_VERSION, tuple(src.transform), src.width, src.height, str(src.crs), all_touched, exact)
+    digest.update(repr(grid).encode())
+    return digest.hexdigest()
+
+
+def _evict(cache_dir, max_bytes):
+    entries = [entry for entry in os.scandir(cache_dir) if entry.name.endswith(".npz")]
+    total = sum(entry.stat().st_size for entry in entries)
+    for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+        if total <= max_bytes:
+            break
+        total -= entry.stat().st_size
+        os.remove(entry.path)
+
+
+def coverage_fractions(geometry, transform, out_shape):
+    """Fraction of each cell of a window covered by geometry.
+
+    Cells not crossed by the boundary are either fully inside or fully outside, so
+    they come from the regular center-in-polygon rasterization in bulk; only the
+    cells the boundary passes through are clipped against the geometry exactly.
+    """
+    inside = geometry_mask([mapping(geometry)], out_shape=out_shape, transform=transform, invert=True)
+    boundary = geometry_mask([mapping(geometry.boundary)], out_shape=out_shape, transform=transform,
+                             invert=True, all_touched=True)
+    weights = (inside & ~boundary).astype(np.float32)
+
+    cell_area = abs(transform.a * transform.e)
+    for row in np.flatnonzero(boundary.any(axis=1)):
+        cols = np.flatnonzero(boundary[row])
+        x0, y0 = transform * (cols, row)
+        x1, y1 = transform * (cols + 1, row + 1)
+        xmin, xmax = np.minimum(x0, x1), np.maximum(x0, x1)
+        ymin, ymax = np.minimum(y0, y1), np.maximum(y0, y1)
+        # Cut the geometry to the row first so each cell intersects a small polygon
+        # (not clip_by_rect, which can return invalid geometry for polygons with holes)
+        strip = shapely.intersection(geometry, shapely.box(xmin.min(), ymin.min(), xmax.max(), ymax.max()))
+        cells = shapely.box(xmin, ymin, xmax, ymax)
+        weights[row, cols] = shapely.area(shapely.intersection(strip, cells)) / cell_area
+    return weights
+
+
+def cached_mask(src, geometry, all_touched=False, exact=False, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """Rasterizes geometry (in the raster CRS) onto src's grid, reusing masks from disk.
+
+    Masks are stored bit-packed and relative to the geometry window. Returns
+    (window, weights) where weights has the window shape and is a boolean
+    inside mask, or with exact=True the float32 covered fraction of each cell
+    (stored as packed full cells plus the sparse boundary fractions).
+    Raises ValueError if the geometry does not overlap the raster.
+    """
+    if isinstance(geometry, dict):
+        geometry = shape(geometry)
+    path = os.path.join(cache_dir, mask_key(geometry, src, all_touched, exact) + ".npz")
+
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            col_off, row_off, width, height = (int(v) for v in cached["window"])
+            weights = np.unpackbits(cached["bits"], count=width * height).astype(bool)
+            if exact:
+                weights = weights.astype(np.float32)
+                weights[cached["idx"]] = cached["frac"]
+        # Touch the file so eviction is least recently used
+        os.utime(path)
+        return Window(col_off, row_off, width, height), weights.reshape(height, width)
+
+    try:
+        window = geometry_window(src, [mapping(geometry)])
+    except WindowError:
+        raise ValueError("Input shapes do not overlap raster.")
+    window = window.round_offsets().round_lengths()
+    out_shape = (window.height, window.width)
+    if exact:
+        weights = coverage_fractions(geometry, src.window_transform(window), out_shape)
+        partial = np.flatnonzero((weights > 0) & (weights < 1))
+        arrays = {"bits": np.packbits(weights == 1), "idx": partial.astype(np.uint32),
+                  "frac": weights.ravel()[partial]}
+    else:
+        weights = geometry_mask([mapping(geometry)], out_shape=out_shape,
+                                transform=src.window_transform(window), invert=True, all_touched=all_touched)
+        arrays = {"bits": np.packbits(weights)}
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, window=np.array([window.col_off, window.row_off, window.width, window.height], dtype=np.int64),
+             **arrays)
+    os.replace(tmp_path, path)
+    _evict(cache_dir, max_bytes)
+    return window, weights
+
+
+def masked_window(src, geometry, band=1, all_touched=False, exact=False):
+    """Reads band inside geometry as a masked array (outside and nodata masked).
+
+    With exact=True every value is weighted by the fraction of its cell covered by
+    the geometry. Returns (image, transform) where transform is the affine of the
+    geometry window.
+    """
+    window, weights = cached_mask(src, geometry, all_touched=all_touched, exact=exact)
+    data = src.read(band, window=window, masked=True)
+    values = data.data * weights if exact else data.data
+    image = np.ma.masked_array(values, mask=np.ma.getmaskarray(data) | (weights == 0))
+    return image, src.window_transform(window)
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pandas as pd
+import rasterio
+from rasterio.warp import transform_geom
+from shapely.geometry import mapping
+
+from src.mask_cache import cached_mask
+
+# Tiled + DEFLATE so a polygon window only decompresses the blocks it touches
+STACK_PROFILE = {"driver": "GTiff", "tiled": True, "blockxsize": 512, "blockysize": 512,
+                 "compress": "deflate", "predictor": 3, "bigtiff": "if_safer"}
+
+
+def _stack_is_fresh(stack_path, years, paths):
+    if not os.path.exists(stack_path):
+        return False
+    with rasterio.open(stack_path) as stack:
+        if stack.descriptions != tuple(str(year) for year in years):
+            return False
+    stack_mtime = os.path.getmtime(stack_path)
+    return all(os.path.getmtime(path) <= stack_mtime for path in paths)
+
+
+def build_stack(rasters_by_year, stack_path):
+    """Writes the yearly rasters of one country as the bands of a single tiled GeoTIFF.
+
+    rasters_by_year maps year -> raster path; all rasters must share the same grid.
+    Bands are copied block by block and described by their year. The stack is only
+    rebuilt when it is missing, has different years or is older than a source.
+    """
+    years = sorted(rasters_by_year)
+    paths = [rasters_by_year[year] for year in years]
+    if _stack_is_fresh(stack_path, years, paths):
+        return stack_path
+
+    with rasterio.open(paths[0]) as first:
+        profile = first.profile
+        grid = (first.width, first.height, first.transform, first.crs)
+
+    profile.update(STACK_PROFILE, count=len(years), dtype="float32")
+    tmp_path = stack_path + ".tmp"
+    with rasterio.open(tmp_path, "w", **profile) as stack:
+        for band, (year, path) in enumerate(zip(years, paths), start=1):
+            with rasterio.open(path) as src:
+                if (src.width, src.height, src.transform, src.crs) != grid:
+                    raise ValueError(f"Raster for {year} ({path}) is not on the same grid as {paths[0]}")
+                for _, window in stack.block_windows(1):
+                    stack.write(src.read(1, window=window).astype("float32"), band, window=window)
+            stack.set_band_description(band, str(year))
+    os.replace(tmp_path, stack_path)
+    return stack_path
+
+
+def stack_population(stack_path, geometries, exact=False):
+    """Sums population inside each geometry (EPSG:4326) for every year band of a stack.
+
+    Each geometry is rasterized once (or taken from the mask cache) into a
+    window-sized mask that is applied to all bands together. exact=True uses
+    fractional boundary coverage (see mask_cache.coverage_fractions). Returns a
+    DataFrame with one row per geometry and one column per year.
+    """
+    totals = {}
+    with rasterio.open(stack_path) as stack:
+        years = [int(description) for description in stack.descriptions]
+        for name, geometry in geometries.items():
+            geom = transform_geom("EPSG:4326", stack.crs, mapping(geometry))
+            try:
+                window, weights = cached_mask(stack, geom, exact=exact)
+            except ValueError:
+                # Geometry does not overlap the raster
+                totals[name] = np.zeros(len(years))
+                continue
+
+            data = stack.read(window=window, masked=True)
+            valid = np.where(np.ma.getmaskarray(data), 0, data.data)
+            totals[name] = (valid * weights).sum(axis=(1, 2), dtype=np.float64)
+
+    return pd.DataFrame.from_dict(totals, orient="index", columns=years)
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import numbers
+import os
+import re
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_DIR = os.path.join(ROOT_DIR, "results", "population")
+
+# One row per value; radius is the buffer in meters (0 for the polygon itself)
+SCHEMA = pa.schema([
+    ("timestamp", pa.timestamp("s", tz="UTC")),
+    ("metric", pa.string()),
+    ("radius", pa.int32()),
+    ("raster", pa.string()),
+    ("params", pa.string()),
+    ("value", pa.float64()),
+    ("written", pa.int64()),
+])
+KEY_COLUMNS = ["timestamp", "metric", "radius", "raster", "params"]
+
+
+def parameter_hash(params):
+    """Short stable hash of the parameters (a JSON serializable dict) a result was computed with."""
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def results_frame(totals, raster, params):
+    """Flattens {timestamp: sum_polygon results} into the long store layout.
+
+    Result keys are "<metric>" or "<metric>_<radius>" (e.g. "pop", "area", "pop_5000").
+    """
+    rows = []
+    for timestamp, results in totals.items():
+        for key, value in results.items():
+            match = re.fullmatch(r"(.+?)_(\d+)", key)
+            metric, radius = (match.group(1), int(match.group(2))) if match else (key, 0)
+            rows.append((int(timestamp), metric, radius, float(value)))
+    frame = pd.DataFrame(rows, columns=["timestamp", "metric", "radius", "value"])
+    frame["timestamp"] = pd.to_datetime(frame["timestamp"], unit="s", utc=True)
+    frame["raster"] = raster
+    frame["params"] = parameter_hash(params)
+    return frame[["timestamp", "metric", "radius", "raster", "params", "value"]]
+
+
+def append_results(frame, store_dir=STORE_DIR):
+    """Appends a long results frame to the store as a new Parquet part file.
+
+    Existing parts are never rewritten; rows with the same key written later win
+    when querying (see compact to fold superseded rows away).
+    """
+    written = time.time_ns()
+    frame = frame.assign(written=written)
+    table = pa.Table.from_pandas(frame, schema=SCHEMA, preserve_index=False)
+    os.makedirs(store_dir, exist_ok=True)
+    path = os.path.join(store_dir, f"part-{written}.parquet")
+    # Dot-prefixed so readers never pick up a half written part
+    tmp_path = os.path.join(store_dir, f".part-{written}.parquet.tmp")
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+    return path
+
+
+def _as_timestamp(value):
+    # Snapshot ids are unix seconds
+    if isinstance(value, numbers.Integral) or (isinstance(value, str) and value.isdigit()):
+        return pd.Timestamp(int(value), unit="s", tz="UTC")
+    timestamp = pd.Timestamp(value)
+    return timestamp.tz_localize("UTC") if timestamp.tzinfo is None else timestamp.tz_convert("UTC")
+
+
+def query_results(metrics=None, start=None, end=None, radii=None, rasters=None, params=None, store_dir=STORE_DIR):
+    """Reads the latest value of every key matching the filters.
+
+    start/end (inclusive) accept unix seconds or anything pandas parses as a date;
+    the other filters take a list of allowed values. Only the matching row groups
+    are read. Returns a long DataFrame sorted by timestamp.
+    """
+    columns = KEY_COLUMNS + ["value"]
+    if not os.path.isdir(store_dir) or not any(name.endswith(".parquet") for name in os.listdir(store_dir)):
+        return pd.DataFrame(columns=columns)
+
+    conditions = []
+    for column, allowed in (("metric", metrics), ("radius", radii), ("raster", rasters), ("params", params)):
+        if allowed is not None:
+            conditions.append(ds.field(column).isin(list(allowed)))
+    if start is not None:
+        conditions.append(ds.field("timestamp") >= pa.scalar(_as_timestamp(start), SCHEMA.field("timestamp").type))
+    if end is not None:
+        conditions.append(ds.field("timestamp") <= pa.scalar(_as_timestamp(end), SCHEMA.field("timestamp").type))
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    dataset = ds.dataset(store_dir, format="parquet", schema=SCHEMA)
+    frame = dataset.to_table(filter=expression).to_pandas()
+    frame = frame.sort_values("written").drop_duplicates(KEY_COLUMNS, keep="last")
+    return frame.sort_values(KEY_COLUMNS)[columns].reset_index(drop=True)
+
+
+def compact(store_dir=STORE_DIR):
+    """Rewrites all parts as a single file holding only the latest value of every key."""
+    parts = [os.path.join(store_dir, name) for name in os.listdir(store_dir) if name.endswith(".parquet")]
+    if len(parts) < 2:
+        return
+    append_results(query_results(store_dir=store_dir), store_dir)
+    for path in parts:
+        os.remove(path)
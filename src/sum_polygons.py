@@ -9,39 +9,40 @@ import geopandas as gpd
 from shapely.geometry import Polygon
 import rasterio
 import json
-from rasterio.mask import mask
+
+from src.chunked import chunked_sums
+from src.mask_cache import masked_window
 
 
 from matplotlib import cm
 from matplotlib.colors import ListedColormap
 import matplotlib.colors as colors
-our_cmap = cm.get_cmap('hot_r', 10)
-newcolors = our_cmap(np.linspace(0, 1, 10))
-background_colour = np.array([0.9882352941176471, 0.9647058823529412, 0.9607843137254902, 1.0])
-newcolors = np.vstack((background_colour, newcolors))
-our_cmap = ListedColormap(newcolors)
-bounds = [0.0, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128]
-norm = colors.BoundaryNorm(bounds, our_cmap.N)
+from functools import lru_cache
+import os
 
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 russian_fills = ['#a52714','#000000','#880e4f','#bcaaa4','#bdbdbd']
 
-file_path = "../pulled_data/1664627935.json"
-with open(file_path, "r") as f:
-    original_polygons = json.load(f)
-polygons_object_list = {"geometry": [ Polygon(item[1]) for item in original_polygons ]}
-polygons_fills = [ item[0] for item in original_polygons ]
-gdf = gpd.GeoDataFrame(polygons_object_list, crs="EPSG:4326")
-
-gdf["fills"]=polygons_fills
+# Snapshot the occupied area is compared against
+BASELINE_POLYGONS = os.path.join(ROOT_DIR, "pulled_data", "1664627935.json")
 
 
-gdf_inner = gdf[gdf["fills"].isin(russian_fills) ]
-unified_original_polygon = gdf_inner.geometry.union_all()
-
-def sum_polygon(polygons, src, buffer_meters = [5,50,500,5000],draw_image=False,title="example"):
+@lru_cache(maxsize=None)
+def plot_style():
+    """Builds the population colormap and its normalization (only needed when drawing)."""
+    our_cmap = cm.get_cmap('hot_r', 10)
+    newcolors = our_cmap(np.linspace(0, 1, 10))
+    background_colour = np.array([0.9882352941176471, 0.9647058823529412, 0.9607843137254902, 1.0])
+    newcolors = np.vstack((background_colour, newcolors))
+    our_cmap = ListedColormap(newcolors)
+    bounds = [0.0, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128]
+    norm = colors.BoundaryNorm(bounds, our_cmap.N)
+    return our_cmap, norm
 
 
+def occupied_polygons(polygons):
+    """Builds a GeoDataFrame of the occupied ([fill, coordinates]) polygons of a snapshot."""
     polygons_object_list = {"geometry": [ Polygon(item[1]) for item in polygons ]}
     polygons_fills = [ item[0] for item in polygons ]
     gdf = gpd.GeoDataFrame(polygons_object_list, crs="EPSG:4326")
@@ -49,31 +50,63 @@ def sum_polygon(polygons, src, buffer_meters = [5,50,500,5000],draw_image=False,
     gdf["fills"]=polygons_fills
 
 
-    gdf_inner = gdf[gdf["fills"].isin(russian_fills) ]
+    return gdf[gdf["fills"].isin(russian_fills) ]
+
+
+@lru_cache(maxsize=None)
+def original_polygon():
+    """Loads the unified occupied polygon of the baseline snapshot."""
+    with open(BASELINE_POLYGONS, "r") as f:
+        original_polygons = json.load(f)
+    return occupied_polygons(original_polygons).geometry.union_all()
+
+def buffered_polygon(polygon, utm_crs, meters):
+    """Buffers an EPSG:4326 polygon by meters in the given metric CRS."""
+    gs = gpd.GeoSeries([polygon], crs="EPSG:4326")
+    return gs.to_crs(utm_crs).buffer(meters).to_crs("EPSG:4326").iloc[0]
+
+def sum_polygon(polygons, src, buffer_meters = [5,50,500,5000],draw_image=False,title="example",exact=False,memory_budget=None):
+    """Occupied population of a snapshot, its change vs. the baseline and buffered rings.
+
+    exact=True weights boundary cells by their covered fraction instead of counting a
+    cell fully when its center is inside, which keeps thin buffers meaningful.
+    With memory_budget (bytes) the raster is processed tile by tile (see
+    chunked.chunked_sums) so it never has to fit in memory; images need the full
+    masked raster and cannot be drawn in that mode.
+    """
+
+
+    gdf_inner = occupied_polygons(polygons)
     unified_polygon = gdf_inner.geometry.union_all()
 
-    # Step 4: Mask the raster with the unified polygon
-    out_image, out_transform = mask(
-        dataset=src,
-        shapes=[unified_polygon]
-    )
-    nodata_value = src.nodata
-    total_pop = out_image[out_image != nodata_value].sum()
-    print(out_image.max())
+    if memory_budget is not None:
+        if draw_image:
+            raise ValueError("draw_image is not supported with memory_budget")
+        utm_crs = gdf_inner.estimate_utm_crs()
+        geometries = {"pop": unified_polygon}
+        geometries.update({f"pop_{meters}": buffered_polygon(unified_polygon, utm_crs, meters) for meters in buffer_meters})
+        sums = chunked_sums(src, geometries, memory_budget, exact=exact)
+        results = {"pop": sums.pop("pop")}
+        diff_poligon = unified_polygon.difference(original_polygon())
+        if diff_poligon.area > 0:
+            results["area"] = diff_poligon.area
+        results.update(sums)
+        return results
+
+    # Step 4: Mask the raster with the unified polygon (rasterized masks are cached on disk)
+    masked_image, out_transform = masked_window(src, unified_polygon, exact=exact)
+    total_pop = masked_image.filled(0).sum()
+    print(masked_image.max())
     results = {"pop": total_pop}
 
 
-    diff_poligon = unified_polygon.difference(unified_original_polygon)
+    diff_poligon = unified_polygon.difference(original_polygon())
     if diff_poligon.area > 0:
         results["area"] = diff_poligon.area
-        out_image_diff, out_transform_diff = mask(
-            dataset=src,
-            shapes=[diff_poligon],
-            crop=True
-        )
+        masked_image_diff, out_transform_diff = masked_window(src, diff_poligon, exact=exact)
     if draw_image:
+        our_cmap, norm = plot_style()
         fig, ax = plt.subplots(1, 1, figsize=(100, 50))
-        masked_image = np.ma.masked_where(out_image == nodata_value, out_image)
 
         show(
             masked_image,
@@ -87,15 +120,14 @@ def sum_polygon(polygons, src, buffer_meters = [5,50,500,5000],draw_image=False,
         ax.set_title('Masked Population Area')
         ax.set_xlabel('Longitude')
         ax.set_ylabel('Latitude')
-        plt.savefig(f"../plots/population/development_plot_{title}.png", dpi=100)
+        plt.savefig(os.path.join(ROOT_DIR, "plots", "population", f"development_plot_{title}.png"), dpi=100)
         plt.close()
         if draw_image and diff_poligon.area > 0:
             fig, ax = plt.subplots(1, 1, figsize=(100, 50))
-            masked_image_diff = np.ma.masked_where(out_image_diff == nodata_value, out_image_diff)
 
             show(
                 masked_image_diff,
-                transform=out_transform,
+                transform=out_transform_diff,
                 ax=ax,
                 cmap=our_cmap,
                 norm=norm
@@ -105,34 +137,28 @@ def sum_polygon(polygons, src, buffer_meters = [5,50,500,5000],draw_image=False,
             ax.set_title('Masked Population Area')
             ax.set_xlabel('Longitude')
             ax.set_ylabel('Latitude')
-            plt.savefig(f"../plots/diff/development_plot_{title}_diff.png", dpi=100)
+            plt.savefig(os.path.join(ROOT_DIR, "plots", "diff", f"development_plot_{title}_diff.png"), dpi=100)
             plt.close()
 
 
 
     for meters in buffer_meters:
-        # Create a GeoSeries to handle projection
-        gs = gpd.GeoSeries([unified_polygon], crs="EPSG:4326")
         # Estimate UTM CRS for metric buffering
         utm_crs = gdf_inner.estimate_utm_crs()
         # Reproject, buffer, and reproject back
-        buffered_shape = gs.to_crs(utm_crs).buffer(meters).to_crs("EPSG:4326").iloc[0]
+        buffered_shape = buffered_polygon(unified_polygon, utm_crs, meters)
 
-        out_image_buf, _ = mask(
-            dataset=src,
-            shapes=[buffered_shape],
-            crop=True
-        )
-        total_pop_buf = out_image_buf[out_image_buf != nodata_value].sum()
+        masked_image_buf, out_transform_buf = masked_window(src, buffered_shape, exact=exact)
+        total_pop_buf = masked_image_buf.filled(0).sum()
         results[f"pop_{ str(meters)}"] = total_pop_buf
 
         if draw_image and meters == max(buffer_meters):
+            our_cmap, norm = plot_style()
             fig, ax = plt.subplots(1, 1, figsize=(20, 20))
-            masked_image = np.ma.masked_where(out_image_buf == nodata_value, out_image_buf)
 
             show(
-                masked_image,
-                transform=out_transform,
+                masked_image_buf,
+                transform=out_transform_buf,
                 ax=ax,
                 cmap=our_cmap,
                 norm=norm
@@ -142,15 +168,15 @@ def sum_polygon(polygons, src, buffer_meters = [5,50,500,5000],draw_image=False,
             ax.set_title('Masked Population Area')
             ax.set_xlabel('Longitude')
             ax.set_ylabel('Latitude')
-            plt.savefig(f"../plots/development_plot_{title}_{str(meters)}.png", dpi=100)
+            plt.savefig(os.path.join(ROOT_DIR, "plots", f"development_plot_{title}_{str(meters)}.png"), dpi=100)
             plt.close()
 
 
     return results
 
 if __name__ == "__main__":
-    with open("../pulled_data/1764624693.json") as f:
+    with open(os.path.join(ROOT_DIR, "pulled_data", "1764624693.json")) as f:
         polygons = json.load(f)
-    raster_path = "../staticData/ukr_ppp_2010_UNadj.tif"
+    raster_path = os.path.join(ROOT_DIR, "staticData", "ukr_ppp_2010_UNadj.tif")
     with rasterio.open(raster_path) as src:
         totals = sum_polygon(polygons,src, [],True,"try7")
@@ -0,0 +1,124 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT_DIR, "staticData")
+# WorldPop URL structure: <BASE_URL>/<collection>/<year>/<ISO>/<file>
+BASE_URL = "https://data.worldpop.org/GIS/Population"
+CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def raster_filename(iso_code, year, resolution="1km", un_adjusted=False):
+    """WorldPop file name of the population count raster of one country and year.
+
+    resolution is "1km" (aggregated) or "100m"; un_adjusted selects the UN adjusted variant.
+    """
+    if resolution == "1km":
+        suffix = "_1km_Aggregated_UNadj" if un_adjusted else "_1km_Aggregated"
+    else:
+        suffix = "_UNadj" if un_adjusted else ""
+    return f"{iso_code.lower()}_ppp_{year}{suffix}.tif"
+
+
+def raster_collection(resolution="1km", un_adjusted=False):
+    """WorldPop directory holding the rasters: the 1 km variants live in their own collections."""
+    if resolution == "1km":
+        return "Global_2000_2020_1km_UNadj" if un_adjusted else "Global_2000_2020_1km"
+    return "Global_2000_2020"
+
+
+def raster_url(iso_code, year, resolution="1km", un_adjusted=False, base_url=BASE_URL):
+    filename = raster_filename(iso_code, year, resolution, un_adjusted)
+    collection = raster_collection(resolution, un_adjusted)
+    return f"{base_url}/{collection}/{year}/{iso_code.upper()}/{filename}"
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _remote_size(response, session, url):
+    """Total size of the remote file from a 416 "Content-Range: bytes */N" header, else a HEAD request."""
+    content_range = response.headers.get("Content-Range", "")
+    if content_range.startswith("bytes */"):
+        return int(content_range[len("bytes */"):])
+    length = session.head(url, allow_redirects=True, timeout=60).headers.get("Content-Length")
+    return int(length) if length is not None else None
+
+
+def download_file(url, dest, sha256=None, session=None, chunk_size=CHUNK_SIZE):
+    """Streams url into dest, resuming a previous partial download.
+
+    Data is written to dest + '.part' (continued with an HTTP Range request when it
+    already exists) and only renamed to dest once the size announced by the server
+    and, when given, the sha256 checksum match. A corrupt download is deleted and
+    raises IOError so the next attempt starts from scratch; a partial file that
+    is larger than the remote one is discarded and downloaded again.
+    """
+    if os.path.exists(dest):
+        return dest
+
+    session = session or requests.Session()
+    part = dest + ".part"
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+    with session.get(url, headers=headers, stream=True, timeout=60) as response:
+        if response.status_code == 416:
+            # Range starts at or past the end of the remote file: the partial download
+            # is only complete if it has exactly the remote size
+            expected_size = _remote_size(response, session, url)
+            if expected_size != offset:
+                os.remove(part)
+                return download_file(url, dest, sha256, session, chunk_size)
+        else:
+            response.raise_for_status()
+            if response.status_code != 206:
+                # Server ignored the Range header, start over
+                offset = 0
+            length = response.headers.get("Content-Length")
+            expected_size = offset + int(length) if length is not None else None
+
+            with open(part, "ab" if offset else "wb") as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+
+    size = os.path.getsize(part)
+    if expected_size is not None and size != expected_size:
+        raise IOError(f"Incomplete download of {url}: {size} of {expected_size} bytes (will resume)")
+    if sha256 is not None and _sha256(part) != sha256.lower():
+        os.remove(part)
+        raise IOError(f"Checksum mismatch for {url}")
+
+    os.replace(part, dest)
+    return dest
+
+
+def download_rasters(rasters, data_dir=DATA_DIR, resolution="1km", un_adjusted=False,
+                     checksums=None, base_url=BASE_URL, max_workers=4):
+    """Downloads the WorldPop rasters of several (iso_code, year) pairs in parallel.
+
+    checksums optionally maps (iso_code, year) to the expected sha256.
+    Returns {(iso_code, year): path or the exception raised while downloading}.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    checksums = checksums or {}
+
+    def fetch(raster):
+        iso_code, year = raster
+        dest = os.path.join(data_dir, raster_filename(iso_code, year, resolution, un_adjusted))
+        try:
+            return download_file(raster_url(iso_code, year, resolution, un_adjusted, base_url), dest,
+                                 sha256=checksums.get(raster))
+        except (requests.RequestException, IOError) as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers) as pool:
+        return dict(zip(rasters, pool.map(fetch, rasters)))
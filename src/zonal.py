@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import rasterio
+from rasterio.warp import transform_geom
+from shapely.geometry import box, mapping, shape
+
+from src.mask_cache import masked_window
+
+
+def raster_footprints(rasters):
+    """Reads the footprint (in EPSG:4326) of each raster from its header only."""
+    footprints = {}
+    for key, path in rasters.items():
+        with rasterio.open(path) as src:
+            footprints[key] = shape(transform_geom(src.crs, "EPSG:4326", mapping(box(*src.bounds))))
+    return footprints
+
+
+def zonal_sum(src, geometry, exact=False):
+    """Sums the valid pixels of src inside geometry (EPSG:4326), reading only its window.
+
+    exact=True weights boundary cells by the fraction covered by the geometry.
+    """
+    geom = transform_geom("EPSG:4326", src.crs, mapping(geometry))
+    try:
+        out_image, _ = masked_window(src, geom, exact=exact)
+    except ValueError:
+        # Geometry does not overlap the raster
+        return 0.0
+    return float(out_image.astype(np.float64).filled(0).sum())
+
+
+def population_sums(geometries, rasters, exact=False):
+    """Sums population inside each geometry for every year of a set of country rasters.
+
+    geometries maps a name to a shapely geometry in EPSG:4326 and rasters maps
+    (iso_code, year) to a raster path. Each geometry is only masked against the
+    rasters whose footprint it intersects, and the per-raster sums of the same
+    year are added up, so a geometry spanning several countries is covered by
+    their mosaic without building one. WorldPop country rasters are nodata
+    outside the national border, so neighbouring rasters never double count.
+
+    exact is passed on to zonal_sum. Returns a DataFrame with one row per geometry
+    and one column per year.
+    """
+    footprints = raster_footprints(rasters)
+    years = sorted({year for _, year in rasters})
+    totals = {name: dict.fromkeys(years, 0.0) for name in geometries}
+
+    for key, path in rasters.items():
+        _, year = key
+        candidates = [name for name, geometry in geometries.items() if footprints[key].intersects(geometry)]
+        if not candidates:
+            continue
+        # Open every raster once and mask all geometries that touch it
+        with rasterio.open(path) as src:
+            for name in candidates:
+                totals[name][year] += zonal_sum(src, geometries[name], exact=exact)
+
+    return pd.DataFrame.from_dict(totals, orient="index", columns=years)
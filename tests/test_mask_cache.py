@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+import shapely
+from rasterio.transform import from_origin
+from shapely.geometry import Point, Polygon, box
+
+from src.mask_cache import coverage_fractions
+
+# 0.01 degree grid covering the test geometries
+TRANSFORM = from_origin(30.5, 49.8, 0.01, 0.01)
+SHAPE = (200, 200)
+
+
+def _brute_force(geometry):
+    weights = np.zeros(SHAPE)
+    for row in range(SHAPE[0]):
+        for col in range(SHAPE[1]):
+            x0, y0 = TRANSFORM * (col, row)
+            x1, y1 = TRANSFORM * (col + 1, row + 1)
+            cell = box(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+            weights[row, col] = shapely.area(shapely.intersection(cell, geometry)) / 1e-4
+    return weights
+
+
+def _jagged():
+    angles = np.linspace(0, 2 * np.pi, 37)[:-1]
+    radii = np.where(np.arange(36) % 2, 0.3, 0.8)
+    return Polygon(zip(31.5 + radii * np.cos(angles), 48.8 + radii * np.sin(angles)))
+
+
+GEOMETRIES = {
+    "ring": Point(31.5, 48.8).buffer(0.7).buffer(0.0005).difference(Point(31.5, 48.8).buffer(0.7)),
+    "holed": box(30.7, 48.0, 32.3, 49.6).difference(Point(31.5, 48.8).buffer(0.4)),
+    "jagged": _jagged(),
+}
+
+
+@pytest.mark.parametrize("name", GEOMETRIES)
+def test_coverage_fractions_match_cell_intersection(name):
+    geometry = GEOMETRIES[name]
+    weights = coverage_fractions(geometry, TRANSFORM, SHAPE)
+    expected = _brute_force(geometry)
+    np.testing.assert_allclose(weights, expected, atol=1e-4)
+    assert weights.sum() == pytest.approx(geometry.area / 1e-4, rel=1e-4)
@@ -0,0 +1,99 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.worldpop import download_file
+
+PAYLOAD = bytes(range(256)) * 4096  # 1 MiB
+
+
+class RasterHandler(BaseHTTPRequestHandler):
+    """Serves PAYLOAD with Range support; server.drop_after / server.ignore_range alter it."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+
+    def do_GET(self):
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header and not self.server.ignore_range:
+            start = int(range_header.removeprefix("bytes=").split("-")[0])
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(PAYLOAD)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")
+        else:
+            self.send_response(200)
+        body = PAYLOAD[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.server.drop_after is not None:
+            # Announce the full body but close the connection half way
+            self.wfile.write(body[:self.server.drop_after])
+            self.server.drop_after = None
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RasterHandler)
+    httpd.drop_after = None
+    httpd.ignore_range = False
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/y.tif"
+
+
+def test_resumes_after_dropped_connection(server, tmp_path):
+    dest = str(tmp_path / "y.tif")
+    server.drop_after = 300_000
+    with pytest.raises(requests.RequestException):
+        download_file(_url(server), dest, chunk_size=64 * 1024)
+    # Every complete chunk received before the drop is kept
+    assert 0 < (tmp_path / "y.tif.part").stat().st_size <= 300_000
+    assert not (tmp_path / "y.tif").exists()
+
+    assert download_file(_url(server), dest) == dest
+    assert (tmp_path / "y.tif").read_bytes() == PAYLOAD
+    assert not (tmp_path / "y.tif.part").exists()
+
+
+def test_server_ignoring_range_restarts(server, tmp_path):
+    server.ignore_range = True
+    (tmp_path / "y.tif.part").write_bytes(PAYLOAD[:1000])
+    download_file(_url(server), str(tmp_path / "y.tif"))
+    assert (tmp_path / "y.tif").read_bytes() == PAYLOAD
+
+
+@pytest.mark.parametrize("stale", [b"x" * (len(PAYLOAD) + 1024), b"x" * len(PAYLOAD)], ids=["oversized", "same-size"])
+def test_stale_or_oversized_part_is_replaced(server, tmp_path, stale):
+    (tmp_path / "y.tif.part").write_bytes(stale)
+    sha256 = None
+    if len(stale) == len(PAYLOAD):
+        # Same size garbage is only detectable with a checksum
+        sha256 = hashlib.sha256(PAYLOAD).hexdigest()
+        with pytest.raises(IOError):
+            download_file(_url(server), str(tmp_path / "y.tif"), sha256=sha256)
+        assert not (tmp_path / "y.tif.part").exists()
+    download_file(_url(server), str(tmp_path / "y.tif"), sha256=sha256)
+    assert (tmp_path / "y.tif").read_bytes() == PAYLOAD